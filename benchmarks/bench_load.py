@@ -0,0 +1,417 @@
+"""
+アプリ全体の負荷試験。
+
+ex_search_gui を一時ディレクトリにコピーし(DBとログも一時ディレクトリに作る)、
+偽の external_search (fake_external_search.py) に接続するよう設定して
+uvicorn で main:app を起動する。シナリオ毎に指定した並列数で一定時間リクエストを送り、
+スループット、レイテンシ(p50/p95/p99)、アプリのピークRSSを出力してJSONに保存する。
+
+    python benchmarks/bench_load.py --concurrency 20 --duration 15 \
+        --latency-dist lognormal --latency-ms 200 --error-rate 0.01
+    python benchmarks/bench_load.py --baseline benchmarks/results/load-xxx.json
+
+シナリオ:
+    search_by_label  POST /api/labels/search/ (ラベルとキーワードを順に変える)
+    labels_preview   POST /api/labels/preview/
+    html             GET /search/, /search/labels/, /search/groups/ を順に
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+from fake_external_search import add_arguments as add_fake_arguments
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(ROOT_DIR, "ex_search_gui")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCENARIOS = ("search_by_label", "labels_preview", "html")
+HTML_PATHS = ("/search/", "/search/labels/", "/search/groups/")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_proc_status(pid: int, key: str) -> int | None:
+    """/proc/<pid>/status の値(KiB)。Linux以外ではNone"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def prepare_app_dir(workdir: str, fake_url: str, use_cache: bool) -> str:
+    """アプリを一時ディレクトリにコピーし、settings.pyの末尾で接続先などを上書きする"""
+    app_dir = os.path.join(workdir, "ex_search_gui")
+    shutil.copytree(
+        APP_DIR, app_dir, ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+    )
+    os.makedirs(os.path.join(workdir, "log"))
+    os.makedirs(os.path.join(workdir, "db"))
+    with open(os.path.join(app_dir, "settings.py"), "a", encoding="utf-8") as f:
+        f.write(
+            "\n# bench_load.py\n"
+            f'API_OPTIONS["get_data"]["url"] = "{fake_url}"\n'
+            f'API_OPTIONS["cache"]["enabled"] = {use_cache}\n'
+        )
+    return app_dir
+
+
+def start_process(args: list[str], cwd: str | None = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, proc: subprocess.Popen):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process exited ,{proc.args}")
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"timeout waiting for {url}")
+
+
+async def setup_data(client: httpx.AsyncClient, labels: int) -> list[int]:
+    for no in range(labels):
+        res = await client.post(
+            "/api/labels/",
+            json={
+                "label_name": f"bench{no}",
+                "base_url": f"https://bench{no % 5}.example.com/search",
+                "query": "q",
+                "download_config": {"sitename": f"bench{no % 5}"},
+            },
+        )
+        res.raise_for_status()
+    res = await client.get("/api/labels/", params={"label": "bench"})
+    label_ids = [label["id"] for label in res.json()]
+    res = await client.post("/api/groups/", json={"name": "bench"})
+    res.raise_for_status()
+    group_id = res.json()["id"]
+    await client.put(f"/api/groups/{group_id}/labels/", json={"label_ids": label_ids})
+    return label_ids
+
+
+def make_request_factory(scenario: str, label_ids: list[int], args):
+    def search_by_label(i: int):
+        return (
+            "POST",
+            "/api/labels/search/",
+            {
+                "label_id": label_ids[i % len(label_ids)],
+                "keyword": f"keyword{i % args.keywords}",
+                "use_cache": args.use_cache,
+            },
+        )
+
+    def labels_preview(i: int):
+        return (
+            "POST",
+            "/api/labels/preview/",
+            {
+                "label_name": "preview",
+                "base_url": "https://preview.example.com/search",
+                "query": "q",
+                "download_config": {"sitename": "preview"},
+                "keywords": [f"keyword{i % args.keywords}"],
+            },
+        )
+
+    def html(i: int):
+        return "GET", HTML_PATHS[i % len(HTML_PATHS)], None
+
+    return {
+        "search_by_label": search_by_label,
+        "labels_preview": labels_preview,
+        "html": html,
+    }[scenario]
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """最近順位法"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(len(sorted_values) * q + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, make_request, app_pid: int, args
+) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    counter = 0
+    peak_rss = 0
+    stop_at = time.monotonic() + args.warmup + args.duration
+    measure_from = time.monotonic() + args.warmup
+
+    async def worker():
+        nonlocal counter
+        while time.monotonic() < stop_at:
+            i = counter
+            counter += 1
+            method, path, body = make_request(i)
+            start = time.perf_counter()
+            try:
+                res = await client.request(method, path, json=body)
+                status = str(res.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if time.monotonic() >= measure_from:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while time.monotonic() < stop_at:
+            peak_rss = max(peak_rss, read_proc_status(app_pid, "VmRSS") or 0)
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(sample_rss(), *[worker() for _ in range(args.concurrency)])
+    elapsed = time.monotonic() - measure_from
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (
+                ("p50", percentile(latencies, 0.50)),
+                ("p95", percentile(latencies, 0.95)),
+                ("p99", percentile(latencies, 0.99)),
+                ("max", latencies[-1] if latencies else None),
+            )
+        },
+        "peak_rss_kib": peak_rss or None,
+    }
+
+
+def print_results(results: dict, baseline: dict | None):
+    header = (
+        f"{'scenario':<16} {'req':>7} {'err':>5} {'rps':>9} "
+        f"{'p50[ms]':>9} {'p95[ms]':>9} {'p99[ms]':>9} {'rss[MiB]':>9}"
+    )
+    print(header)
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        rss = result["peak_rss_kib"]
+        print(
+            f"{name:<16} {result['requests']:>7} {result['errors']:>5} "
+            f"{result['throughput_rps'] or 0:>9.1f} "
+            f"{latency['p50'] or 0:>9.1f} {latency['p95'] or 0:>9.1f} "
+            f"{latency['p99'] or 0:>9.1f} {(rss or 0) / 1024:>9.1f}"
+        )
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            print(f"{'  vs baseline':<16} {compare(base, result)}")
+    if results["app_peak_rss_kib"]:
+        print(f"app peak RSS (VmHWM): {results['app_peak_rss_kib'] / 1024:.1f} MiB")
+
+
+def compare(base: dict, current: dict) -> str:
+    def ratio(before, after):
+        if not before or after is None:
+            return "n/a"
+        return f"{(after - before) / before * 100:+.1f}%"
+
+    return (
+        f"rps {ratio(base['throughput_rps'], current['throughput_rps'])}, "
+        f"p50 {ratio(base['latency_ms']['p50'], current['latency_ms']['p50'])}, "
+        f"p95 {ratio(base['latency_ms']['p95'], current['latency_ms']['p95'])}, "
+        f"p99 {ratio(base['latency_ms']['p99'], current['latency_ms']['p99'])}"
+    )
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    fake_port, app_port = free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    fake_args = [
+        "--latency-dist",
+        args.latency_dist,
+        "--latency-ms",
+        str(args.latency_ms),
+        "--latency-jitter-ms",
+        str(args.latency_jitter_ms),
+        "--error-rate",
+        str(args.error_rate),
+        "--error-status",
+        str(args.error_status),
+        "--items",
+        str(args.items),
+        "--title-size",
+        str(args.title_size),
+    ]
+    if args.seed is not None:
+        fake_args += ["--seed", str(args.seed)]
+    fake_proc = app_proc = None
+    try:
+        app_dir = prepare_app_dir(
+            workdir, f"http://127.0.0.1:{fake_port}/api/", args.use_cache
+        )
+        fake_proc = start_process(
+            [
+                sys.executable,
+                os.path.join(os.path.dirname(__file__), "fake_external_search.py"),
+                "--port",
+                str(fake_port),
+                *fake_args,
+            ]
+        )
+        app_proc = start_process(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--port",
+                str(app_port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            cwd=app_dir,
+        )
+        limits = httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        )
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{app_port}",
+            timeout=args.timeout,
+            limits=limits,
+        ) as client:
+            await wait_ready(client, f"http://127.0.0.1:{fake_port}/stats", fake_proc)
+            await wait_ready(client, "/metrics", app_proc)
+            label_ids = await setup_data(client, args.labels)
+            scenarios = {}
+            for scenario in args.scenarios:
+                before = (
+                    await client.get(f"http://127.0.0.1:{fake_port}/stats")
+                ).json()
+                scenarios[scenario] = await run_scenario(
+                    client,
+                    make_request_factory(scenario, label_ids, args),
+                    app_proc.pid,
+                    args,
+                )
+                after = (await client.get(f"http://127.0.0.1:{fake_port}/stats")).json()
+                scenarios[scenario]["upstream_requests"] = (
+                    after["search"] - before["search"]
+                )
+                # 上流のエラーはerror_msg付きの200として返るため、偽サーバ側で数える
+                scenarios[scenario]["upstream_errors"] = (
+                    after["errors"] - before["errors"]
+                )
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "environment": {
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "options": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "baseline")
+            },
+            "scenarios": scenarios,
+            "app_peak_rss_kib": read_proc_status(app_proc.pid, "VmHWM"),
+        }
+    finally:
+        for proc in (app_proc, fake_proc):
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scenarios",
+        type=lambda v: [name.strip() for name in v.split(",") if name.strip()],
+        default=list(SCENARIOS),
+        help=f"カンマ区切り ({','.join(SCENARIOS)})",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="秒/シナリオ")
+    parser.add_argument("--warmup", type=float, default=1.0, help="秒。集計しない")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--labels", type=int, default=20)
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="検索結果キャッシュを有効にする(既定は毎回上流に問い合わせる)",
+    )
+    parser.add_argument("--output", default=None, help="結果のJSONの保存先")
+    parser.add_argument("--baseline", default=None, help="比較する過去の結果のJSON")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios ,{sorted(unknown)}")
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
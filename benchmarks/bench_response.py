@@ -0,0 +1,130 @@
+"""
+検索結果レスポンスのシリアライズと圧縮のベンチマーク。
+
+SearchByLabelResponse 相当のデータ(ラベル数 x 商品数)について、
+1レスポンスあたりのCPU時間と送信バイト数を出力する。
+
+    python benchmarks/bench_response.py --labels 20 --items 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ex_search_gui"))
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from common.compression import CompressionMiddleware, available_encoders  # noqa: E402
+from common.responses import (  # noqa: E402
+    OrjsonResponse,
+    default_response_class_options,
+)
+from domain.schemas.search import (  # noqa: E402
+    SearchByLabelResponse,
+    SearchResult,
+    SearchResults,
+)
+
+
+def make_payload(labels: int, items: int) -> SearchByLabelResponse:
+    return SearchByLabelResponse(
+        results={
+            label_id: SearchResults(
+                results=[
+                    SearchResult(
+                        title=f"【中古】サンプル商品 タイトル {label_id}-{no} " * 3,
+                        price=1000 + no,
+                        taxin=True,
+                        condition="中古",
+                        is_success=True,
+                        url=f"https://shop.example.com/item/{label_id}/{no}",
+                        sitename="example",
+                        image_url=f"https://img.example.com/{label_id}/{no}.jpg",
+                        stock_msg="在庫あり",
+                        sub_urls=[
+                            f"https://shop.example.com/item/{label_id}/{no}?s={i}"
+                            for i in range(5)
+                        ],
+                        others={"shop": "秋葉原店", "point": no % 10, "note": "x" * 40},
+                    )
+                    for no in range(items)
+                ]
+            )
+            for label_id in range(labels)
+        }
+    )
+
+
+def measure(func, repeat: int) -> tuple[float, int]:
+    """1回あたりのCPU時間(ms)と結果のバイト数"""
+    func()
+    start = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return (time.process_time() - start) / repeat * 1000, len(result)
+
+
+def bench_serializers(payload: SearchByLabelResponse, repeat: int):
+    data = payload.model_dump(mode="json")
+    cases = {
+        "stdlib json (JSONResponse)": lambda: JSONResponse(data).body,
+        "orjson (OrjsonResponse)": lambda: OrjsonResponse(data).body,
+        "pydantic model_dump_json": lambda: payload.model_dump_json().encode(),
+    }
+    print(f"{'serializer':<30} {'cpu[ms]':>8} {'bytes':>10}")
+    for name, func in cases.items():
+        cpu, size = measure(func, repeat)
+        print(f"{name:<30} {cpu:>8.2f} {size:>10}")
+
+
+async def bench_app(payload: SearchByLabelResponse, repeat: int):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    router = APIRouter(**default_response_class_options())
+
+    @router.get("/search", response_model=SearchByLabelResponse)
+    async def search():
+        return payload
+
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    print(f"\n{'accept-encoding':<30} {'cpu[ms]':>8} {'bytes':>10}")
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for encoding in ["identity", *available_encoders()]:
+            headers = {"Accept-Encoding": encoding}
+            res = await client.get("/search", headers=headers)
+            size = (
+                len(res.content) if encoding == "identity" else res.num_bytes_downloaded
+            )
+            start = time.process_time()
+            for _ in range(repeat):
+                await client.get("/search", headers=headers)
+            cpu = (time.process_time() - start) / repeat * 1000
+            print(f"{encoding:<30} {cpu:>8.2f} {size:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--labels", type=int, default=20)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    payload = make_payload(args.labels, args.items)
+    print(
+        f"labels={args.labels} items={args.items} "
+        f"raw={len(json.dumps(payload.model_dump(mode='json')))} chars"
+    )
+    bench_serializers(payload, args.repeat)
+    asyncio.run(bench_app(payload, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+SearchURLConfigRepositorySQL.save_all のマイクロベンチマーク。
+
+一時ファイルのSQLiteに対して、以前の1件ずつ ses.get / refresh する実装と
+現在の一括upsert実装で、新規作成と更新それぞれの所要時間を比較する。
+
+    python benchmarks/bench_save_all.py --sizes 1000 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ex_search_gui"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from databases.sql.search.repository import SearchURLConfigRepositorySQL  # noqa: E402
+from domain.models.search import search as m_search  # noqa: E402
+
+
+async def legacy_save_all(ses: AsyncSession, configs: list[m_search.SearchURLConfig]):
+    """一括upsert導入前の実装"""
+    saved_configs = []
+    for config in configs:
+        if not config.id:
+            ses.add(config)
+            saved_configs.append(config)
+            continue
+        db_config = await ses.get(m_search.SearchURLConfig, config.id)
+        if not db_config:
+            raise ValueError(f"not found config.id ,{config.id}")
+        db_config.label_name = config.label_name
+        db_config.base_url = config.base_url
+        db_config.query = config.query
+        db_config.query_encoding = config.query_encoding
+        db_config.download_type = config.download_type
+        db_config.download_config = config.download_config
+        saved_configs.append(db_config)
+    await ses.commit()
+    for saved_config in saved_configs:
+        await ses.refresh(saved_config)
+
+
+def make_configs(size: int, ids: list[int] | None = None, suffix: str = ""):
+    return [
+        m_search.SearchURLConfig(
+            id=ids[i] if ids else None,
+            label_name=f"label{i}{suffix}",
+            base_url=f"https://example.com/{i}/search",
+            query="q",
+            download_config={"sitename": "example", "no": i},
+        )
+        for i in range(size)
+    ]
+
+
+async def run(size: int, name: str, save_all) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmpdir}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=True) as ses:
+            configs = make_configs(size)
+            start = time.perf_counter()
+            await save_all(ses, configs)
+            insert_time = time.perf_counter() - start
+            ids = [config.id for config in configs]
+
+        async with AsyncSession(engine, expire_on_commit=True) as ses:
+            configs = make_configs(size, ids=ids, suffix="-updated")
+            start = time.perf_counter()
+            await save_all(ses, configs)
+            update_time = time.perf_counter() - start
+        await engine.dispose()
+    return {"name": name, "size": size, "insert": insert_time, "update": update_time}
+
+
+async def bulk_save_all(ses: AsyncSession, configs: list[m_search.SearchURLConfig]):
+    await SearchURLConfigRepositorySQL(ses).save_all(configs)
+
+
+async def main(sizes: list[int]):
+    print(f"{'impl':<8} {'size':>7} {'insert[s]':>10} {'update[s]':>10}")
+    for size in sizes:
+        for name, func in (("legacy", legacy_save_all), ("bulk", bulk_save_all)):
+            result = await run(size, name, func)
+            print(
+                f"{result['name']:<8} {result['size']:>7} "
+                f"{result['insert']:>10.3f} {result['update']:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
@@ -0,0 +1,141 @@
+"""
+負荷試験用の external_search の代わりのサーバ。
+
+/api/search/ と /api/search/info/ に、指定した分布の遅延・エラー率・件数で応答する。
+
+    python benchmarks/fake_external_search.py --port 8061 \
+        --latency-dist lognormal --latency-ms 200 --latency-jitter-ms 100 \
+        --error-rate 0.01 --items 30
+"""
+
+import argparse
+import asyncio
+import math
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+LATENCY_DISTS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class FakeOptions:
+    def __init__(self, args: argparse.Namespace):
+        self.latency_dist = args.latency_dist
+        self.latency = args.latency_ms / 1000
+        self.jitter = args.latency_jitter_ms / 1000
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.items = args.items
+        self.title_size = args.title_size
+        self.seed = args.seed
+
+
+def sample_latency(opts: FakeOptions, rng: random.Random) -> float:
+    """秒。latencyは平均、jitterは幅(uniform)または標準偏差"""
+    match opts.latency_dist:
+        case "uniform":
+            value = rng.uniform(opts.latency - opts.jitter, opts.latency + opts.jitter)
+        case "normal":
+            value = rng.gauss(opts.latency, opts.jitter)
+        case "lognormal":
+            if opts.latency <= 0:
+                return 0.0
+            # 平均がlatency、標準偏差がjitterになるようにする
+            sigma2 = math.log(1 + (opts.jitter / opts.latency) ** 2)
+            mu = math.log(opts.latency) - sigma2 / 2
+            value = rng.lognormvariate(mu, math.sqrt(sigma2))
+        case "exponential":
+            value = rng.expovariate(1 / opts.latency) if opts.latency > 0 else 0.0
+        case _:
+            value = opts.latency
+    return max(value, 0.0)
+
+
+def make_results(opts: FakeOptions, url: str, sitename: str) -> list[dict]:
+    return [
+        {
+            "title": f"商品{no} " + "x" * opts.title_size,
+            "price": 1000 + no,
+            "taxin": True,
+            "condition": "中古",
+            "is_success": True,
+            "url": f"{url}#item{no}",
+            "sitename": sitename,
+            "image_url": f"https://img.example.com/{no}.jpg",
+            "stock_msg": "在庫あり",
+        }
+        for no in range(opts.items)
+    ]
+
+
+def create_app(opts: FakeOptions) -> Starlette:
+    rng = random.Random(opts.seed)
+    stats = {"search": 0, "search_info": 0, "errors": 0}
+
+    async def respond(request: Request, name: str, body: dict) -> JSONResponse:
+        stats[name] += 1
+        await asyncio.sleep(sample_latency(opts, rng))
+        if rng.random() < opts.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"detail": "fake upstream error"}, status_code=opts.error_status
+            )
+        return JSONResponse(body)
+
+    async def search(request: Request):
+        data = await request.json()
+        results = make_results(
+            opts, url=data.get("url") or "", sitename=data.get("sitename") or ""
+        )
+        return await respond(request, "search", {"results": results, "error_msg": ""})
+
+    async def search_info(request: Request):
+        await request.json()
+        results = [{"gid": str(no), "name": f"カテゴリ{no}"} for no in range(10)]
+        return await respond(
+            request, "search_info", {"results": results, "error_msg": ""}
+        )
+
+    async def get_stats(request: Request):
+        return JSONResponse(stats)
+
+    return Starlette(
+        routes=[
+            Route("/api/search/", search, methods=["POST"]),
+            Route("/api/search/info/", search_info, methods=["POST"]),
+            Route("/stats", get_stats, methods=["GET"]),
+        ]
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--title-size", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8061)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(FakeOptions(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
+from common.tracing import traced
 from domain.schemas import search as search_schema
 from app.getdata.models import search as search_model
 
 
 class ModelConvert:
     @classmethod
+    @traced("ModelConvert.searchresult_to_schema")
     def searchresult_to_schema(
         cls, results: search_model.SearchResults
     ) -> search_schema.SearchResults:
@@ -3,11 +3,13 @@ from urllib.parse import urlparse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from common.tracing import traced
 from . import convert
 from app.getdata.models import search as search_model
 from app.getdata import get_search
 
 
+@traced()
 async def download_with_api(ses: AsyncSession, searchreq: search_model.SearchRequest):
     if not searchreq.url:
         return False, f"url is required."
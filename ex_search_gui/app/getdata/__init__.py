@@ -1,3 +1,10 @@
-from .getdata import get_search, get_search_info
+from .getdata import get_search, get_search_info, get_circuit_breaker_statuses
+from .client import open_client, close_client
 
-__all__ = ["get_search", "get_search_info"]
+__all__ = [
+    "get_search",
+    "get_search_info",
+    "get_circuit_breaker_statuses",
+    "open_client",
+    "close_client",
+]
@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timezone
+
+from common.enums import AutoLowerName, auto
+from common.read_config import APICircuitBreakerOption
+from .models.breaker import CircuitBreakerStatus
+
+
+class BreakerState(AutoLowerName):
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class CircuitBreaker:
+    """
+    連続失敗がfailure_thresholdに達するとOPENになり即座に失敗を返す。
+    cooldown経過後はHALF_OPENとなり、1件だけ試行(probe)を通す。
+    """
+
+    def __init__(self, sitename: str, option: APICircuitBreakerOption):
+        self.sitename = sitename
+        self.option = option
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.opened_at_utc: datetime | None = None
+        self.probe_in_flight = False
+        self.last_error = ""
+
+    def retry_after(self) -> float | None:
+        if self.state != BreakerState.OPEN or self.opened_at is None:
+            return None
+        return max(0.0, self.opened_at + self.option.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        match self.state:
+            case BreakerState.CLOSED:
+                return True
+            case BreakerState.OPEN:
+                if self.retry_after():
+                    return False
+                self.state = BreakerState.HALF_OPEN
+                self.probe_in_flight = True
+                return True
+            case BreakerState.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+                return True
+        return True
+
+    def record_success(self):
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.opened_at_utc = None
+        self.probe_in_flight = False
+
+    def record_failure(self, error: str):
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.probe_in_flight = False
+        if (
+            self.state == BreakerState.HALF_OPEN
+            or self.consecutive_failures >= self.option.failure_threshold
+        ):
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+            self.opened_at_utc = datetime.now(timezone.utc)
+
+    def release_probe(self):
+        """probeが結果を出さずに終了(キャンセル等)した場合に次の試行を許可する"""
+        self.probe_in_flight = False
+
+    def error_msg(self) -> str:
+        return (
+            f"circuit breaker is open for {self.sitename}, "
+            f"retry after {self.retry_after() or 0.0:.1f}s, "
+            f"last error: {self.last_error}"
+        )
+
+    def status(self) -> CircuitBreakerStatus:
+        return CircuitBreakerStatus(
+            sitename=self.sitename,
+            state=self.state.value,
+            consecutive_failures=self.consecutive_failures,
+            opened_at=self.opened_at_utc,
+            retry_after=self.retry_after(),
+            last_error=self.last_error,
+        )
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(
+        self, sitename: str, option: APICircuitBreakerOption
+    ) -> CircuitBreaker | None:
+        if not option.enabled:
+            return None
+        breaker = self._breakers.get(sitename)
+        if breaker is None:
+            breaker = CircuitBreaker(sitename=sitename, option=option)
+            self._breakers[sitename] = breaker
+        else:
+            breaker.option = option
+        return breaker
+
+    def statuses(self) -> list[CircuitBreakerStatus]:
+        return [
+            self._breakers[sitename].status() for sitename in sorted(self._breakers)
+        ]
@@ -0,0 +1,66 @@
+from contextlib import asynccontextmanager
+
+import httpx
+import structlog
+
+from common import read_config
+
+_client: httpx.AsyncClient | None = None
+
+
+def _is_http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_client() -> httpx.AsyncClient:
+    get_data_opt = read_config.get_api_options().get_data
+    clientopt = get_data_opt.client
+    http2 = clientopt.http2
+    if http2 and not _is_http2_available():
+        log = structlog.get_logger(__name__)
+        log.warning("http2 is enabled but h2 is not installed, fallback to http/1.1")
+        http2 = False
+    headers = {}
+    if not clientopt.compression:
+        headers["Accept-Encoding"] = "identity"
+    return httpx.AsyncClient(
+        timeout=get_data_opt.timeout,
+        limits=httpx.Limits(
+            max_connections=clientopt.max_connections,
+            max_keepalive_connections=clientopt.max_keepalive_connections,
+            keepalive_expiry=clientopt.keepalive_expiry,
+        ),
+        http2=http2,
+        headers=headers,
+    )
+
+
+async def open_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def borrow_client(timeout: float):
+    """
+    共有クライアントを貸し出す。
+    lifespan外(クライアント未作成)から呼ばれた場合は一時的なクライアントを使う。
+    """
+    if _client is not None and not _client.is_closed:
+        yield _client
+        return
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        yield client
@@ -1,27 +1,70 @@
+import time
+
 import httpx
+import structlog
 
-from common import read_config
+from common import read_config, metrics, tracing
+from .client import borrow_client
 from .factory import APIPathOptionFactory
 from .enums import APIURLName
 from .util import create_api_url
 from .models.info import InfoRequest, InfoResponse
 from .models.search import SearchRequest, SearchResponse
 from .models.error import ErrorMsg
+from .singleflight import SingleFlight, make_key
+from .scheduler import UpstreamScheduler, get_download_type, get_target_sitename
+from .breaker import CircuitBreakerRegistry
+
+search_flight = SingleFlight()
+scheduler = UpstreamScheduler()
+breakers = CircuitBreakerRegistry()
 
 
-async def _get_search_result(apiurlname: APIURLName, data: dict, timeout: float):
+async def _get_search_result(
+    apiurlname: APIURLName, data: dict, timeout: float, sitename: str = ""
+):
     apiopt = APIPathOptionFactory().create(apiurlname=apiurlname)
     api_url = create_api_url(apiopt=apiopt)
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    labels = (apiurlname.value, sitename)
+    start = time.perf_counter()
+    metrics.upstream_requests_in_flight.inc(*labels)
+    with tracing.start_span(
+        "getdata._get_search_result", apiurlname=apiurlname.value, sitename=sitename
+    ) as span:
+        # 上流(external_search)にトレースを引き継ぐ
+        headers = {}
+        if traceparent := tracing.make_traceparent(span):
+            headers["traceparent"] = traceparent
         try:
-            match apiopt.method.lower():
-                case "post":
-                    res = await client.post(api_url, json=data)
-                case _:
-                    raise ValueError(f"no support method, {apiopt.method.lower()}")
-            res.raise_for_status()
-        except Exception as e:
-            return False, f"failed to api, type:{type(e).__name__}, {e}", None
+            async with borrow_client(timeout=timeout) as client:
+                try:
+                    match apiopt.method.lower():
+                        case "post":
+                            res = await client.post(
+                                api_url, json=data, timeout=timeout, headers=headers
+                            )
+                        case _:
+                            raise ValueError(
+                                f"no support method, {apiopt.method.lower()}"
+                            )
+                    res.raise_for_status()
+                except Exception as e:
+                    outcome = (
+                        "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+                    )
+                    metrics.upstream_requests_total.inc(*labels, outcome)
+                    msg = f"failed to api, type:{type(e).__name__}, {e}"
+                    if span:
+                        span.set_error(msg)
+                    return False, msg, None
+        finally:
+            metrics.upstream_requests_in_flight.dec(*labels)
+            metrics.upstream_request_duration_seconds.observe(
+                time.perf_counter() - start, *labels
+            )
+        if span:
+            span.set_attribute("http.status_code", res.status_code)
+    metrics.upstream_requests_total.inc(*labels, "ok")
     res_json = res.json()
     if not isinstance(res_json, dict):
         return False, f"invalid type response, type:{type(res_json)}, {res_json}", None
@@ -41,10 +84,11 @@ async def _convert_to_response_model(data: dict, class_type: type):
 
 
 async def _get_request_timeout(sitename: str, top_key: str = "get_data") -> float:
-    get_data_opt = read_config.get_api_options().model_dump()[top_key]
-    if get_data_opt.get(sitename) and get_data_opt[sitename].get("timeout"):
-        return get_data_opt[sitename]["timeout"]
-    return get_data_opt["timeout"]
+    get_data_opt = getattr(read_config.get_api_options(), top_key)
+    site_option = get_data_opt.get_site_option(sitename)
+    if site_option and site_option.timeout:
+        return site_option.timeout
+    return get_data_opt.timeout
 
 
 async def get_search_info(inforeq: InfoRequest):
@@ -71,11 +115,92 @@ async def get_search_info(inforeq: InfoRequest):
     return True, convert_result
 
 
+async def _get_search_result_scheduled(
+    apiurlname: APIURLName, data: dict, timeout: float, sitename: str, options: dict
+):
+    get_data_opt = read_config.get_api_options().get_data
+    target_sitename = get_target_sitename(sitename=sitename, options=options)
+    breaker = breakers.get(target_sitename, get_data_opt.circuit_breaker)
+    if breaker is None:
+        return await _get_search_result_limited(
+            apiurlname=apiurlname,
+            data=data,
+            timeout=timeout,
+            target_sitename=target_sitename,
+            options=options,
+        )
+    if not breaker.allow():
+        metrics.upstream_requests_total.inc(
+            apiurlname.value, target_sitename, "circuit_open"
+        )
+        return False, breaker.error_msg(), None
+    try:
+        ok, msg, result = await _get_search_result_limited(
+            apiurlname=apiurlname,
+            data=data,
+            timeout=timeout,
+            target_sitename=target_sitename,
+            options=options,
+        )
+    except BaseException:
+        breaker.release_probe()
+        raise
+    if ok:
+        breaker.record_success()
+    else:
+        breaker.record_failure(msg)
+    return ok, msg, result
+
+
+async def _get_search_result_limited(
+    apiurlname: APIURLName,
+    data: dict,
+    timeout: float,
+    target_sitename: str,
+    options: dict,
+):
+    get_data_opt = read_config.get_api_options().get_data
+    download_type = get_download_type(options)
+    async with scheduler.slot(
+        sitename=target_sitename,
+        site_option=get_data_opt.get_site_option(target_sitename),
+        download_type=download_type,
+        download_type_option=get_data_opt.download_types.get(download_type),
+    ) as queue_wait:
+        start = time.monotonic()
+        result = await _get_search_result(
+            apiurlname=apiurlname,
+            data=data,
+            timeout=timeout,
+            sitename=target_sitename,
+        )
+        upstream_time = time.monotonic() - start
+    metrics.upstream_queue_wait_seconds.observe(queue_wait, target_sitename)
+    log = structlog.get_logger(__name__)
+    log.info(
+        "upstream request finished",
+        apiurlname=apiurlname.value,
+        sitename=target_sitename,
+        download_type=download_type,
+        queue_wait=round(queue_wait, 3),
+        upstream_time=round(upstream_time, 3),
+    )
+    return result
+
+
 async def get_search(searchreq: SearchRequest):
-    ok, msg, result = await _get_search_result(
-        apiurlname=APIURLName.SEARCH,
-        data=searchreq.model_dump(mode="json"),
-        timeout=await _get_request_timeout(sitename=searchreq.sitename),
+    data = searchreq.model_dump(mode="json")
+    timeout = await _get_request_timeout(sitename=searchreq.sitename)
+    # 同一リクエストが同時に来た場合は上流への呼び出しを1回にまとめる
+    ok, msg, result = await search_flight.do(
+        key=make_key(APIURLName.SEARCH.value, data),
+        func=lambda: _get_search_result_scheduled(
+            apiurlname=APIURLName.SEARCH,
+            data=data,
+            timeout=timeout,
+            sitename=searchreq.sitename,
+            options=searchreq.options,
+        ),
     )
     if not ok:
         return ok, msg
@@ -93,3 +218,7 @@ async def get_search(searchreq: SearchRequest):
     if convert_result.error_msg:
         return False, convert_result.error_msg
     return True, convert_result
+
+
+def get_circuit_breaker_statuses():
+    return breakers.statuses()
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class CircuitBreakerStatus(BaseModel):
+    sitename: str
+    state: str
+    consecutive_failures: int = 0
+    opened_at: datetime | None = None
+    retry_after: float | None = Field(default=None)  # seconds
+    last_error: str = ""
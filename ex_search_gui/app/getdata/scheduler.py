@@ -0,0 +1,109 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
+
+from common.read_config import APILimitOption
+
+
+class TokenBucket:
+    """
+    予約方式のトークンバケット。
+    到着順にトークンを予約するため、待機は到着順(FIFO)になる。
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            float(self.burst), self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self.tokens / self.rate)
+        except asyncio.CancelledError:
+            # 使わなかったトークンを返す
+            self.tokens += 1
+            raise
+
+
+class Limiter:
+    def __init__(self, option: APILimitOption):
+        self.option = option
+        self.semaphore = (
+            asyncio.Semaphore(option.max_in_flight) if option.max_in_flight else None
+        )
+        self.bucket = TokenBucket(option.rate, option.burst) if option.rate else None
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.semaphore is None:
+            if self.bucket:
+                await self.bucket.acquire()
+            yield
+            return
+        async with self.semaphore:
+            if self.bucket:
+                await self.bucket.acquire()
+            yield
+
+
+class UpstreamScheduler:
+    """サイト名とダウンロードタイプ毎に流量(rate)と同時実行数(max_in_flight)を制限する"""
+
+    def __init__(self):
+        self._limiters: dict[tuple[str, str], Limiter] = {}
+
+    def _get_limiter(self, kind: str, name: str, option: APILimitOption | None):
+        if option is None or (option.rate is None and option.max_in_flight is None):
+            return None
+        key = (kind, name)
+        limiter = self._limiters.get(key)
+        if limiter is None or limiter.option != option:
+            limiter = Limiter(option)
+            self._limiters[key] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        sitename: str,
+        site_option: APILimitOption | None,
+        download_type: str,
+        download_type_option: APILimitOption | None,
+    ):
+        """枠が確保できるまで待ち、待ち時間(秒)を返す"""
+        start = time.monotonic()
+        async with AsyncExitStack() as stack:
+            for limiter in (
+                self._get_limiter("site", sitename, site_option),
+                self._get_limiter("download_type", download_type, download_type_option),
+            ):
+                if limiter:
+                    await stack.enter_async_context(limiter.acquire())
+            yield time.monotonic() - start
+
+
+def get_download_type(options: dict) -> str:
+    for download_type in ("nodriver", "selenium"):
+        if options.get(download_type):
+            return download_type
+    return "httpx"
+
+
+def get_target_sitename(sitename: str, options: dict) -> str:
+    """ラベル検索ではsitenameは"gemini"固定のため、optionsのsitenameを優先する"""
+    target = options.get("sitename")
+    if isinstance(target, str) and target:
+        return target
+    return sitename
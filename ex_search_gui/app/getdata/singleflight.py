@@ -0,0 +1,45 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """
+    同じキーで同時に実行された非同期処理を1回の実行にまとめる。
+    待機中の呼び出し元がキャンセルされても共有している処理は継続し、
+    待機者が全員いなくなった場合のみ共有処理をキャンセルする。
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._forget(key, t))
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+
+
+def make_key(name: str, data: dict) -> str:
+    return f"{name}:{json.dumps(data, sort_keys=True, ensure_ascii=False)}"
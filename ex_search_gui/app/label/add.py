@@ -1,5 +1,9 @@
+import json
+
 from pydantic import BaseModel
 
+from common.http_cache import make_etag
+
 from app.gemini.models import (
     AskGeminiOptions,
     SeleniumWaitOptions,
@@ -11,14 +15,55 @@ from app.gemini.models import (
     HttpxOptions,
 )
 
+# テンプレートに個別設定がある download_type。それ以外は共通部分のみ
+TEMPLATE_OPTION_TYPES = ("", "httpx", "selenium", "nodriver")
+
+
+class RenderedConfigTemplate(BaseModel):
+    body: bytes
+    etag: str
+
 
 class SearchLabelDownLoadConfigTemplateService:
+    """
+    option_type毎に内容が固定なので、起動時(precompute)に一度だけ作って保持する
+    """
+
     option_type: str
+    _templates: dict[str, AskGeminiOptions] = {}
+    _rendered: dict[str, RenderedConfigTemplate] = {}
 
     def __init__(self, option_type: str):
         self.option_type = option_type
 
+    @classmethod
+    def precompute(cls):
+        for option_type in TEMPLATE_OPTION_TYPES:
+            template = cls._build(option_type)
+            body = json.dumps(
+                template.model_dump(exclude_none=True), ensure_ascii=False
+            ).encode("utf-8")
+            cls._templates[option_type] = template
+            cls._rendered[option_type] = RenderedConfigTemplate(
+                body=body, etag=make_etag(body)
+            )
+
+    def _key(self) -> str:
+        if not self._templates:
+            self.precompute()
+        if self.option_type in TEMPLATE_OPTION_TYPES:
+            return self.option_type
+        return ""
+
     async def execute(self):
+        return self._templates[self._key()].model_copy(deep=True)
+
+    async def execute_rendered(self) -> RenderedConfigTemplate:
+        """JSONにシリアライズ済みのテンプレートとETag"""
+        return self._rendered[self._key()]
+
+    @staticmethod
+    def _build(option_type: str) -> AskGeminiOptions:
         response = AskGeminiOptions(
             sitename="sitename",
             label="labelname",
@@ -39,7 +84,7 @@ class SearchLabelDownLoadConfigTemplateService:
             save=True,
             load=True,
         )
-        match self.option_type:
+        match option_type:
             case "nodriver":
                 response.nodriver = NodriverOptions(
                     cookie=example_cookie,
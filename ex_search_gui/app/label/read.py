@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
+from common.pagination import decode_cursor, split_page
 from databases.sql.search import repository as search_repository
 from domain.models.search import command as search_command
 from domain.schemas.search.html import SearchLabels
@@ -8,15 +9,30 @@ from domain.schemas.search.search import SearchURLConfigSchema
 
 
 class SearchLabelViewTemplateService:
-    def __init__(self, db_session: AsyncSession, label: str | None = None):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        label: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ):
         self.db_session = db_session
         self.label = label
+        self.cursor = cursor
+        self.limit = limit
 
     async def execute(self, label: str | None = None) -> SearchLabels:
+        """不正なcursorの場合はValueError"""
         repo = search_repository.SearchURLConfigRepositorySQL(self.db_session)
-        command = search_command.SearchURLConfigCommand(label_name=label)
-        labels = await repo.get_all(command)
+        page_cursor = decode_cursor(self.cursor, "id") if self.cursor else None
+        command = search_command.SearchURLConfigCommand(
+            label_name=label,
+            after_id=page_cursor.id if page_cursor else None,
+            limit=self.limit + 1 if self.limit is not None else None,
+        )
+        labels, next_cursor = split_page(await repo.get_all(command), self.limit, "id")
         return SearchLabels(
+            next_cursor=next_cursor,
             labels=[
                 SearchURLConfigSchema(
                     id=db_label.id,
@@ -28,7 +44,7 @@ class SearchLabelViewTemplateService:
                     download_config=db_label.download_config,
                 )
                 for db_label in labels
-            ]
+            ],
         )
 
 
@@ -0,0 +1,139 @@
+import json
+from typing import AsyncIterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from databases.sql.search.repository import load_caches
+from databases.sql.search.transfer import (
+    SearchConfigTransferRepositorySQL,
+    TRANSFER_MODELS,
+)
+from domain.schemas.search import search as search_schema
+from app.search import cache as search_cache
+
+TRANSFER_SCHEMAS: dict[str, type[BaseModel]] = {
+    "label": search_schema.TransferLabel,
+    "product_label": search_schema.TransferProductLabel,
+    "group": search_schema.TransferGroup,
+    "group_label": search_schema.TransferGroupLabel,
+}
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, str]]:
+    """受信したバイト列を行に分割する。(行番号, 行) を返す"""
+    buffer = b""
+    lineno = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            lineno += 1
+            yield lineno, line.decode("utf-8", errors="replace")
+    if buffer:
+        lineno += 1
+        yield lineno, buffer.decode("utf-8", errors="replace")
+
+
+class SearchConfigExportService:
+    def __init__(self, db_session: AsyncSession, chunk_size: int = 500):
+        self.db_session = db_session
+        self.chunk_size = chunk_size
+
+    async def execute(self) -> AsyncIterator[str]:
+        repo = SearchConfigTransferRepositorySQL(self.db_session)
+        for kind, schema in TRANSFER_SCHEMAS.items():
+            async for row in repo.iter_rows(kind, chunk_size=self.chunk_size):
+                data = schema.model_validate(row, from_attributes=True)
+                record = search_schema.TransferRecord(
+                    type=kind, data=data.model_dump(mode="json")
+                )
+                yield record.model_dump_json() + "\n"
+
+
+class SearchConfigImportService:
+    """
+    NDJSONを1行ずつ検証し、chunk_size件毎にまとめてupsertする。
+    グループ所属(group_label)は参照先が揃ってから書き込むため最後にまとめて書き込む。
+    全体で1トランザクション。不正な行はスキップしてエラーとして返す。
+    """
+
+    def __init__(self, db_session: AsyncSession, chunk_size: int = 500):
+        self.db_session = db_session
+        self.chunk_size = chunk_size
+
+    async def execute(
+        self, chunks: AsyncIterator[bytes]
+    ) -> search_schema.TransferImportResponse:
+        log = structlog.get_logger(__name__)
+        repo = SearchConfigTransferRepositorySQL(self.db_session)
+        pending: dict[str, list[dict]] = {kind: [] for kind in TRANSFER_MODELS}
+        counts: dict[str, int] = {kind: 0 for kind in TRANSFER_MODELS}
+        errors: list[search_schema.TransferImportError] = []
+
+        async def flush(kind: str):
+            await repo.upsert_chunk(kind, pending[kind])
+            counts[kind] += len(pending[kind])
+            pending[kind] = []
+
+        try:
+            async for lineno, line in iter_ndjson_lines(chunks):
+                if not line.strip():
+                    continue
+                try:
+                    record = search_schema.TransferRecord.model_validate_json(line)
+                    data = TRANSFER_SCHEMAS[record.type].model_validate(record.data)
+                except ValidationError as e:
+                    errors.append(
+                        search_schema.TransferImportError(
+                            line=lineno,
+                            error=json.dumps(
+                                e.errors(include_url=False, include_context=False),
+                                ensure_ascii=False,
+                                default=str,
+                            ),
+                        )
+                    )
+                    continue
+                pending[record.type].append(data.model_dump())
+                # グループ所属は全てのラベルとグループを書き込むまで保持する
+                if (
+                    record.type != "group_label"
+                    and len(pending[record.type]) >= self.chunk_size
+                ):
+                    await flush(record.type)
+            for kind in TRANSFER_MODELS:
+                if kind != "group_label":
+                    await flush(kind)
+            links = pending["group_label"]
+            for start in range(0, len(links), self.chunk_size):
+                pending["group_label"] = links[start : start + self.chunk_size]
+                await flush("group_label")
+            await self.db_session.commit()
+        except SQLAlchemyError as e:
+            await self.db_session.rollback()
+            log.error(
+                "failed to import configs",
+                error_type=type(e).__name__,
+                error=str(e),
+            )
+            errors.append(
+                search_schema.TransferImportError(
+                    line=0, error=f"{type(e).__name__}: rolled back all rows"
+                )
+            )
+            return search_schema.TransferImportResponse(
+                success=False,
+                counts={kind: 0 for kind in TRANSFER_MODELS},
+                errors=errors,
+            )
+
+        await load_caches(self.db_session)
+        search_cache.clear()
+        return search_schema.TransferImportResponse(
+            success=True, counts=counts, errors=errors
+        )
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+
+from common import metrics
+from common.read_config import get_api_options
+from domain.schemas import search as search_schema
+from domain.models.search import search as m_search
+
+
+class CacheEntry:
+    label_id: int | None
+    value: search_schema.SearchResults
+    size: int
+    created_at: float
+    expires_at: float
+
+    def __init__(
+        self,
+        label_id: int | None,
+        value: search_schema.SearchResults,
+        size: int,
+        ttl: float,
+    ):
+        self.label_id = label_id
+        self.value = value
+        self.size = size
+        self.created_at = time.monotonic()
+        self.expires_at = self.created_at + ttl
+
+
+class SearchResultCache:
+    """
+    ラベル設定のフィンガープリントと正規化したキーワードをキーとする
+    TTL付きLRUキャッシュ。エントリ数とバイト数の両方で上限を持つ。
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._label_keys: dict[int, set[str]] = {}
+
+    @staticmethod
+    def label_fingerprint(label_config: m_search.SearchURLConfig) -> str:
+        data = {
+            "base_url": label_config.base_url,
+            "query": label_config.query,
+            "query_encoding": label_config.query_encoding,
+            "download_config": label_config.download_config,
+        }
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def normalize_keyword(keyword: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", keyword).split())
+
+    def make_key(self, label_config: m_search.SearchURLConfig, keyword: str) -> str:
+        return (
+            f"{self.label_fingerprint(label_config)}:{self.normalize_keyword(keyword)}"
+        )
+
+    def get(self, key: str) -> search_schema.SearchResults | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.cache_requests_total.inc("search_result", "miss")
+            return None
+        now = time.monotonic()
+        if entry.expires_at <= now:
+            self._remove(key)
+            metrics.cache_requests_total.inc("search_result", "expired")
+            return None
+        metrics.cache_requests_total.inc("search_result", "hit")
+        self._entries.move_to_end(key)
+        return entry.value.model_copy(
+            update={"from_cache": True, "cache_age": now - entry.created_at}
+        )
+
+    def set(
+        self,
+        key: str,
+        value: search_schema.SearchResults,
+        ttl: float,
+        label_id: int | None = None,
+    ):
+        if ttl <= 0:
+            return
+        size = len(value.model_dump_json())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(
+            label_id=label_id, value=value, size=size, ttl=ttl
+        )
+        self.total_bytes += size
+        if label_id is not None:
+            self._label_keys.setdefault(label_id, set()).add(key)
+        while (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_label(self, label_id: int):
+        for key in self._label_keys.pop(label_id, set()):
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._label_keys.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        if entry.label_id is not None:
+            keys = self._label_keys.get(entry.label_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._label_keys[entry.label_id]
+
+
+_search_result_cache: SearchResultCache | None = None
+
+
+def get_search_result_cache() -> SearchResultCache | None:
+    """キャッシュが無効に設定されている場合はNoneを返す"""
+    global _search_result_cache
+    cacheopt = get_api_options().cache
+    if not cacheopt.enabled:
+        return None
+    if _search_result_cache is None:
+        _search_result_cache = SearchResultCache(
+            max_entries=cacheopt.max_entries, max_bytes=cacheopt.max_bytes
+        )
+    return _search_result_cache
+
+
+def get_label_ttl(label_config: m_search.SearchURLConfig) -> float:
+    """設定のlabel_ttl(ラベル名)、site_ttl(サイト名)、ttlの順に探す"""
+    cacheopt = get_api_options().cache
+    if label_config.label_name in cacheopt.label_ttl:
+        return cacheopt.label_ttl[label_config.label_name]
+    sitename = (label_config.download_config or {}).get("sitename")
+    if sitename in cacheopt.site_ttl:
+        return cacheopt.site_ttl[sitename]
+    return cacheopt.ttl
+
+
+def invalidate_label(label_id: int):
+    if _search_result_cache is not None:
+        _search_result_cache.invalidate_label(label_id)
+
+
+def clear():
+    if _search_result_cache is not None:
+        _search_result_cache.clear()
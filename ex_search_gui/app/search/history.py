@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+
+import structlog
+
+from common.read_config import get_api_options
+from databases.sql.util import aSessionLocal
+from databases.sql.search.repository import SearchResultHistoryRepositorySQL
+from domain.schemas import search as search_schema
+
+
+class SearchHistoryWriter:
+    """
+    検索結果の履歴をキューに溜め、バックグラウンドでまとめて書き込む。
+    1バッチ = 1トランザクション(executemany)。
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[dict] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        opts = get_api_options().history
+        self._queue = asyncio.Queue(maxsize=opts.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """キューに残っている分を書き出してから止める"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def record(
+        self,
+        label_id: int,
+        keyword: str,
+        results: search_schema.SearchResults,
+        fetched_at: datetime | None = None,
+    ) -> int:
+        """履歴に積む。書き込みは待たない。積んだ件数を返す"""
+        if not self.running or not get_api_options().history.enabled:
+            return 0
+        if not fetched_at:
+            fetched_at = datetime.now(timezone.utc)
+        count = 0
+        dropped = 0
+        for result in results.results:
+            row = {
+                "label_id": label_id,
+                "keyword": keyword,
+                "fetched_at": fetched_at,
+                "title": result.title,
+                "price": result.price,
+                "url": result.url,
+                "stock_msg": result.stock_msg,
+                "stock_quantity": result.stock_quantity,
+                "is_success": result.is_success,
+            }
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                dropped += 1
+                continue
+            count += 1
+        if dropped:
+            log = structlog.get_logger(__name__)
+            log.warning(
+                "search history queue is full, rows dropped",
+                label_id=label_id,
+                dropped=dropped,
+            )
+        return count
+
+    def _drain(self, rows: list[dict], limit: int) -> bool:
+        """キューから取れるだけ取る。終了の目印を見つけたらTrueを返す"""
+        while len(rows) < limit:
+            try:
+                row = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if row is None:
+                return True
+            rows.append(row)
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            opts = get_api_options().history
+            row = await self._queue.get()
+            if row is None:
+                break
+            rows = [row]
+            # flush_interval 秒経つかbatch_sizeに達するまで溜める
+            deadline = loop.time() + opts.flush_interval
+            while len(rows) < opts.batch_size:
+                stopping = self._drain(rows, opts.batch_size)
+                if stopping or len(rows) >= opts.batch_size:
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                rows.append(row)
+            await self._write(rows)
+        # 終了の目印の後に積まれた分も書き出す
+        rows = []
+        self._drain(rows, self._queue.qsize())
+        if rows:
+            await self._write(rows)
+
+    async def _write(self, rows: list[dict]):
+        log = structlog.get_logger(__name__)
+        try:
+            async with aSessionLocal() as ses:
+                await SearchResultHistoryRepositorySQL(ses).add_all(rows)
+        except Exception as e:
+            log.error(
+                "failed to write search history",
+                rows=len(rows),
+                error_type=type(e).__name__,
+                error=str(e),
+            )
+
+
+search_history_writer = SearchHistoryWriter()
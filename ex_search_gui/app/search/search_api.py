@@ -1,10 +1,16 @@
 from urllib.parse import urlparse, quote
+import asyncio
 import copy
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from common.read_config import get_api_options
+from common.tracing import traced
 from domain.schemas import search as search_schema
+from domain.models.search import search as m_search
 from app.gemini.web_scraper import download_with_api, search_model
+from . import cache as search_cache
+from .history import search_history_writer
 
 
 async def generate_target_urls(
@@ -25,19 +31,72 @@ async def generate_target_urls(
     return target_urls
 
 
-async def search_via_api_for_preview(
-    ses: AsyncSession, searchreq: search_schema.SearchURLConfigPreviewRequest
-):
+async def _download_target_url(
+    ses: AsyncSession, url: str, options: dict
+) -> search_schema.SearchResults:
+    searchreq_model = search_model.SearchRequest(
+        url=url,
+        sitename="gemini",
+        options=options,
+    )
+    ok, result = await download_with_api(ses, searchreq_model)
+    if not ok:
+        if isinstance(result, str):
+            return search_schema.SearchResults(error_msg=result)
+    if not isinstance(result, search_schema.SearchResults):
+        return search_schema.SearchResults(
+            error_msg=f"type is not SearchResult, type:{type(result)}, value:{result}",
+        )
+    return result
+
+
+async def _download_target_urls(
+    ses: AsyncSession, target_urls: list[str], download_config: dict
+) -> dict[str, search_schema.SearchResults]:
+    """
+    最初のURLだけを単独で実行し(パーサ作成/recreate_parserのため)、
+    残りのURLは設定に応じて並列に実行する。結果はtarget_urlsの順序を保つ。
+    """
     results_dict: dict[str, search_schema.SearchResults] = {}
-    target_urls = []
-    no_recreate_config = None
+    urls = list(dict.fromkeys(target_urls))
+    if not urls:
+        return results_dict
 
+    options = download_config
     if (
-        "recreate_parser" in searchreq.download_config
-        and searchreq.download_config["recreate_parser"] is True
+        "recreate_parser" in download_config
+        and download_config["recreate_parser"] is True
     ):
-        no_recreate_config = copy.deepcopy(searchreq.download_config)
-        no_recreate_config["recreate_parser"] = False
+        options = copy.deepcopy(download_config)
+        options["recreate_parser"] = False
+
+    first_url, *rest_urls = urls
+    results_dict[first_url] = await _download_target_url(
+        ses, first_url, download_config
+    )
+
+    searchopt = get_api_options().search
+    if not searchopt.preview_concurrent:
+        for url in rest_urls:
+            results_dict[url] = await _download_target_url(ses, url, options)
+        return results_dict
+
+    semaphore = asyncio.Semaphore(searchopt.preview_max_concurrency)
+
+    async def _download_bounded(url: str):
+        async with semaphore:
+            return await _download_target_url(ses, url, options)
+
+    results = await asyncio.gather(*[_download_bounded(url) for url in rest_urls])
+    results_dict.update(zip(rest_urls, results))
+    return results_dict
+
+
+@traced()
+async def search_via_api_for_preview(
+    ses: AsyncSession, searchreq: search_schema.SearchURLConfigPreviewRequest
+):
+    target_urls = []
 
     if searchreq.learning_url:
         target_urls.append(searchreq.learning_url)
@@ -55,48 +114,17 @@ async def search_via_api_for_preview(
             )
         )
 
-    count = 0
-    for url in target_urls:
-        if results_dict.get(url):
-            continue
-        if no_recreate_config and count > 0:
-            options = no_recreate_config
-        else:
-            options = searchreq.download_config
-        searchreq_model = search_model.SearchRequest(
-            url=url,
-            sitename="gemini",
-            options=options,
-        )
-        ok, result = await download_with_api(ses, searchreq_model)
-        count += 1
-        if not ok:
-            if isinstance(result, str):
-                results_dict[url] = search_schema.SearchResults(error_msg=result)
-                continue
-        if not isinstance(result, search_schema.SearchResults):
-            results_dict[url] = search_schema.SearchResults(
-                error_msg=f"type is not SearchResult, type:{type(result)}, value:{result}",
-            )
-            continue
-        results_dict[url] = result
-
+    results_dict = await _download_target_urls(
+        ses, target_urls=target_urls, download_config=searchreq.download_config
+    )
     return search_schema.SearchURLConfigPreviewResponse(results=results_dict)
 
 
+@traced()
 async def get_product_via_api_for_preview(
     ses: AsyncSession, productreq: search_schema.ProductPageConfigPreviewRequest
 ):
-    results_dict: dict[str, search_schema.SearchResults] = {}
     target_urls = []
-    no_recreate_config = None
-
-    if (
-        "recreate_parser" in productreq.download_config
-        and productreq.download_config["recreate_parser"] is True
-    ):
-        no_recreate_config = copy.deepcopy(productreq.download_config)
-        no_recreate_config["recreate_parser"] = False
 
     if productreq.learning_url:
         target_urls.append(productreq.learning_url)
@@ -104,30 +132,128 @@ async def get_product_via_api_for_preview(
     if productreq.target_urls:
         target_urls.extend(productreq.target_urls)
 
-    count = 0
-    for url in target_urls:
-        if results_dict.get(url):
-            continue
-        if no_recreate_config and count > 0:
-            options = no_recreate_config
-        else:
-            options = productreq.download_config
-        searchreq_model = search_model.SearchRequest(
-            url=url,
-            sitename="gemini",
-            options=options,
+    results_dict = await _download_target_urls(
+        ses, target_urls=target_urls, download_config=productreq.download_config
+    )
+    return search_schema.ProductPageConfigPreviewResponse(results=results_dict)
+
+
+@traced()
+async def search_via_api_by_label(
+    ses: AsyncSession,
+    label_config: m_search.SearchURLConfig,
+    keyword: str,
+    use_cache: bool = True,
+) -> search_schema.SearchResults | None:
+    result_cache = search_cache.get_search_result_cache() if use_cache else None
+    if result_cache is not None:
+        cache_key = result_cache.make_key(label_config, keyword)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    preview_request = search_schema.SearchURLConfigPreviewRequest(
+        id=label_config.id,
+        label_name=label_config.label_name,
+        base_url=label_config.base_url,
+        query=label_config.query,
+        query_encoding=label_config.query_encoding,
+        download_type=label_config.download_type,
+        download_config=label_config.download_config,
+        keywords=[keyword],
+    )
+    response = await search_via_api_for_preview(ses=ses, searchreq=preview_request)
+    if len(response.results) == 0:
+        return None
+    # response.resultsはURLをキーとする辞書なので、最初の値を取得する
+    result = list(response.results.values())[0]
+    if not result.error_msg:
+        search_history_writer.record(
+            label_id=label_config.id, keyword=keyword, results=result
+        )
+    if result_cache is not None and not result.error_msg:
+        result_cache.set(
+            cache_key,
+            result,
+            ttl=search_cache.get_label_ttl(label_config),
+            label_id=label_config.id,
         )
-        ok, result = await download_with_api(ses, searchreq_model)
-        count += 1
-        if not ok:
-            if isinstance(result, str):
-                results_dict[url] = search_schema.SearchResults(error_msg=result)
-                continue
-        if not isinstance(result, search_schema.SearchResults):
-            results_dict[url] = search_schema.SearchResults(
-                error_msg=f"type is not SearchResult, type:{type(result)}, value:{result}",
+    return result
+
+
+async def _search_via_api_by_label_bounded(
+    semaphore: asyncio.Semaphore,
+    ses: AsyncSession,
+    label_config: m_search.SearchURLConfig,
+    keyword: str,
+    use_cache: bool = True,
+):
+    async with semaphore:
+        try:
+            result = await search_via_api_by_label(
+                ses=ses, label_config=label_config, keyword=keyword, use_cache=use_cache
             )
-            continue
-        results_dict[url] = result
+        except Exception as e:
+            result = search_schema.SearchResults(
+                error_msg=f"failed to search, type:{type(e).__name__}, {e}"
+            )
+    return label_config.id, result
 
-    return search_schema.ProductPageConfigPreviewResponse(results=results_dict)
+
+async def search_via_api_by_labels(
+    ses: AsyncSession,
+    label_configs: list[m_search.SearchURLConfig],
+    keyword: str,
+    max_concurrency: int,
+    use_cache: bool = True,
+) -> search_schema.SearchByLabelResponse:
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(
+        *[
+            _search_via_api_by_label_bounded(
+                semaphore=semaphore,
+                ses=ses,
+                label_config=label_config,
+                keyword=keyword,
+                use_cache=use_cache,
+            )
+            for label_config in label_configs
+        ]
+    )
+    return search_schema.SearchByLabelResponse(
+        results={label_id: result for label_id, result in results if result is not None}
+    )
+
+
+async def iter_search_via_api_by_labels(
+    ses: AsyncSession,
+    label_configs: list[m_search.SearchURLConfig],
+    keyword: str,
+    max_concurrency: int,
+    use_cache: bool = True,
+):
+    """検索が完了したラベルから順に SearchByLabelStreamItem を返す"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = [
+        asyncio.create_task(
+            _search_via_api_by_label_bounded(
+                semaphore=semaphore,
+                ses=ses,
+                label_config=label_config,
+                keyword=keyword,
+                use_cache=use_cache,
+            )
+        )
+        for label_config in label_configs
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            label_id, result = await next_done
+            yield search_schema.SearchByLabelStreamItem(
+                label_id=label_id, result=result
+            )
+    finally:
+        # クライアント切断時などに残りの検索を止める
+        for task in tasks:
+            if not task.done():
+                task.cancel()
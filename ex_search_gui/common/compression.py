@@ -0,0 +1,196 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.read_config import get_server_options, CompressionOption
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _GzipEncoder:
+    def __init__(self, opts: CompressionOption):
+        self._obj = zlib.compressobj(opts.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, opts: CompressionOption):
+        self._obj = brotli.Compressor(quality=opts.brotli_quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, opts: CompressionOption):
+        self._obj = zstandard.ZstdCompressor(level=opts.zstd_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encoders() -> dict[str, type]:
+    encoders = {"gzip": _GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    return encoders
+
+
+def select_encoding(accept_encoding: str, preferred: list[str]) -> str | None:
+    """Accept-Encodingと設定の優先順から使う圧縮方式を決める"""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    encoders = available_encoders()
+    candidates = [
+        name
+        for name in preferred
+        if name in encoders and accepted.get(name, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    # qが大きいものを優先し、同じなら設定の順
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0.0)))
+
+
+class CompressionMiddleware:
+    """
+    レスポンスをgzip/brotli/zstdで圧縮する。
+    一括のレスポンスはminimum_size未満なら圧縮しない。
+    ストリーミングのレスポンスはチャンク毎にflushし、逐次届くようにする。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        opts = get_server_options().compression
+        encoding = None
+        if opts.enabled:
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            encoding = select_encoding(accept_encoding, opts.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, opts)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, opts: CompressionOption):
+        self._send = send
+        self._encoding = encoding
+        self._opts = opts
+        self._start: Message | None = None
+        self._encoder = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._encoder is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            if not self._should_compress(headers, body, more_body):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._encoder = available_encoders()[self._encoding](self._opts)
+            headers["Content-Encoding"] = self._encoding
+            headers.add_vary_header("Accept-Encoding")
+            # 圧縮後の内容はバイト単位では一致しないので弱いETagにする
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                body = self._encoder.compress(body) + self._encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self._start)
+
+        if more_body:
+            data = self._encoder.compress(body) + self._encoder.flush()
+        else:
+            data = self._encoder.compress(body) + self._encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
+
+    def _should_compress(
+        self, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        if self._start["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        if not more_body and len(body) < self._opts.minimum_size:
+            return False
+        return True
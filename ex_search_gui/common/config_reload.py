@@ -0,0 +1,72 @@
+import asyncio
+import os
+import signal
+
+import structlog
+
+from . import read_config
+
+
+class ConfigReloader:
+    """SIGHUP受信時、またはsettings.pyの更新を検知した時に設定を再読み込みする"""
+
+    def __init__(self):
+        self._watch_task: asyncio.Task | None = None
+        self._signal_installed = False
+
+    async def start(self):
+        opts = read_config.get_config_options()
+        loop = asyncio.get_running_loop()
+        if opts.reload_on_signal and hasattr(signal, "SIGHUP"):
+            try:
+                loop.add_signal_handler(signal.SIGHUP, self.reload)
+                self._signal_installed = True
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Windowsやメインスレッド以外では使えない
+                pass
+        if opts.watch_file:
+            self._watch_task = asyncio.create_task(self._watch(opts.watch_interval))
+
+    async def stop(self):
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._signal_installed = False
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def reload(self) -> bool:
+        log = structlog.get_logger(__name__)
+        try:
+            snapshot = read_config.reload_config()
+        except Exception as e:
+            log.error(
+                "failed to reload config, keep current config",
+                error_type=type(e).__name__,
+                error=str(e),
+            )
+            return False
+        log.info("config reloaded", version=snapshot.version)
+        return True
+
+    async def _watch(self, interval: float):
+        path = read_config.get_settings_path()
+        last_mtime = self._get_mtime(path)
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._get_mtime(path)
+            if mtime == last_mtime:
+                continue
+            last_mtime = mtime
+            self.reload()
+
+    @staticmethod
+    def _get_mtime(path: str) -> float | None:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
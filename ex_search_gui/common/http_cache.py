@@ -0,0 +1,46 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# 毎回再検証させる(ETagが一致すれば304)
+CACHE_CONTROL_REVALIDATE = "private, no-cache"
+# 起動中は変わらないもの
+CACHE_CONTROL_STATIC = "public, max-age=3600"
+
+
+def make_etag(*parts: str | bytes) -> str:
+    """強いETag。partsの内容が同じなら同じ値になる"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Matchにetagが含まれるか(弱い比較)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for value in header.split(","):
+        value = value.strip()
+        if value == "*":
+            return True
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, cache_control: str = CACHE_CONTROL_REVALIDATE) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = CACHE_CONTROL_REVALIDATE) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(etag, cache_control),
+    )
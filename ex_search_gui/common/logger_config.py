@@ -1,14 +1,170 @@
+import atexit
+import gzip
 import logging
-import sys
+import logging.handlers
 import os
-from typing import Literal
+import queue
+import random
+import shutil
+import sys
+import time
+import zlib
+from typing import Any, Literal
 
 import structlog
+from pydantic import BaseModel
 from structlog.dev import ConsoleRenderer
 from structlog.processors import JSONRenderer
 
 
-from .read_config import get_log_options
+from .read_config import get_log_options, LogRotationOption
+from .tracing import add_trace_context
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    サイズ(max_bytes)または経過時間(interval)でローテーションする。
+    compressがTrueならローテーションしたファイルをgzip圧縮する(app.log.1.gz ...)。
+    出力はQueueListenerのスレッドで行うので、圧縮もイベントループを止めない。
+    """
+
+    def __init__(self, filename: str, option: LogRotationOption):
+        super().__init__(
+            filename,
+            maxBytes=option.max_bytes,
+            backupCount=option.backup_count,
+            encoding="utf-8",
+        )
+        self.interval = option.interval
+        self.rollover_at = self._next_rollover()
+        if option.compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._compress
+
+    def _next_rollover(self) -> float | None:
+        if self.interval is None:
+            return None
+        return time.time() + self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    キューが一杯ならログを捨てて件数を数える(呼び出し側を待たせない)。
+    整形は出力先のハンドラが別スレッドで行うため、ここでは行わない。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.LogRecord(
+                name=__name__,
+                level=logging.WARNING,
+                pathname=__file__,
+                lineno=0,
+                msg="log queue was full, %d records dropped",
+                args=(dropped,),
+                exc_info=None,
+            )
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self.dropped += dropped
+
+
+def _truncate(value: Any, opts, depth: int) -> Any:
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    if isinstance(value, str):
+        if len(value) > opts.max_string_length:
+            omitted = len(value) - opts.max_string_length
+            return f"{value[:opts.max_string_length]}...(+{omitted} chars)"
+        return value
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    if depth >= opts.max_depth:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        result = {
+            key: _truncate(v, opts, depth + 1)
+            for key, v in list(value.items())[: opts.max_items]
+        }
+        if len(value) > opts.max_items:
+            result["..."] = f"+{len(value) - opts.max_items} items"
+        return result
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        result = [_truncate(v, opts, depth + 1) for v in items[: opts.max_items]]
+        if len(items) > opts.max_items:
+            result.append(f"...(+{len(items) - opts.max_items} items)")
+        return result
+    return _truncate(repr(value), opts, depth)
+
+
+def truncate_values(logger, method_name: str, event_dict: dict) -> dict:
+    """大きな値(リクエスト全体など)を設定の上限まで切り詰める"""
+    opts = get_log_options().truncate
+    for key, value in event_dict.items():
+        if key == "exception":
+            continue
+        event_dict[key] = _truncate(value, opts, 0)
+    return event_dict
+
+
+def sample_events(logger, method_name: str, event_dict: dict) -> dict:
+    """
+    INFO以下のログを設定の割合で間引く。
+    request_idがあれば同じリクエストのログはまとめて残す/捨てる。
+    """
+    rate = get_log_options().sampling.get_rate(
+        str(event_dict.get("event", "")), method_name
+    )
+    if rate >= 1.0:
+        return event_dict
+    request_id = event_dict.get("request_id")
+    if request_id:
+        score = zlib.crc32(str(request_id).encode("utf-8")) / 2**32
+    else:
+        score = random.random()
+    if score >= rate:
+        raise structlog.DropEvent
+    return event_dict
+
+
+def stop_logger():
+    """キューに残っているログを出力してから出力スレッドを止める"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def configure_logger(
@@ -19,15 +175,22 @@ def configure_logger(
     enable_stdout: bool = True,
     enable_fileout: bool = True,
 ):
+    global _listener
     structlog.configure(
         processors=[
+            structlog.stdlib.filter_by_level,
             structlog.contextvars.merge_contextvars,
+            add_trace_context,
+            sample_events,
             structlog.processors.StackInfoRenderer(),
             structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M.%S", utc=True),
             structlog.processors.UnicodeDecoder(),
             structlog.stdlib.add_log_level,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.PositionalArgumentsFormatter(),
+            # 例外情報は出力スレッドでは取れないため、ここで文字列にする
+            structlog.processors.format_exc_info,
+            truncate_values,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         cache_logger_on_first_use=True,
@@ -43,16 +206,30 @@ def configure_logger(
         file_path = os.path.join(logoptions.directory_path, filename)
     else:
         file_path = filename
-    handler_file = logging.FileHandler(file_path)
+    handler_file = SizedTimedRotatingFileHandler(file_path, logoptions.rotation)
     handler_file.setFormatter(
         structlog.stdlib.ProcessorFormatter(processor=JSONRenderer())
     )
 
-    root_logger = logging.getLogger()
+    handlers = []
     if enable_stdout:
-        root_logger.addHandler(handler_stdout)
+        handlers.append(handler_stdout)
     if enable_fileout:
-        root_logger.addHandler(handler_file)
+        handlers.append(handler_file)
+    # 出力(整形とファイル書き込み)はQueueListenerのスレッドで行う
+    stop_logger()
+    log_queue = queue.Queue(maxsize=logoptions.queue_size)
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logger)
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root_logger.removeHandler(handler)
+    root_logger.addHandler(DroppingQueueHandler(log_queue))
     match logging_level:
         case int():
             root_logger.setLevel(logging_level)
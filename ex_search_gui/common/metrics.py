@@ -0,0 +1,327 @@
+import functools
+import inspect
+import math
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.read_config import get_server_options
+
+# Prometheusのテキスト形式で出力するメトリクス。
+# 値の更新はイベントループのスレッドからのみ行う前提で、ロックを取らない。
+# 更新はラベル値のタプルをキーにした辞書の参照と数値の加算のみ。
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels_text(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return self.header() + self.samples()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def items(self) -> list[tuple[tuple, float]]:
+        return list(self._values.items())
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.items()
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float):
+        self._values[labelvalues] = value
+
+
+class CallbackGauge(_Metric):
+    """出力時にcallbackを呼んで値を得る。callbackは {ラベル値のタプル: 値} を返す"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], dict[tuple, float]],
+        labelnames: tuple[str, ...] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.callback().items()
+        ]
+
+
+class Histogram(_Metric):
+    """
+    バケット毎の件数は累積せずに持ち、出力時に累積する。
+    値は [バケット毎の件数..., +Infの件数, 合計] のリスト
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labelvalues):
+        counts = self._values.get(labelvalues)
+        if counts is None:
+            counts = [0] * (len(self.buckets) + 2)
+            self._values[labelvalues] = counts
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, counts in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _labels_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric name ,{metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route and status",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route (until the response body is sent)",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being processed")
+)
+upstream_requests_total = registry.register(
+    Counter(
+        "upstream_requests_total",
+        "Upstream API requests by outcome (ok, error, timeout, circuit_open)",
+        ("apiurlname", "sitename", "outcome"),
+    )
+)
+upstream_request_duration_seconds = registry.register(
+    Histogram(
+        "upstream_request_duration_seconds",
+        "Upstream API latency",
+        ("apiurlname", "sitename"),
+        buckets=UPSTREAM_BUCKETS,
+    )
+)
+upstream_queue_wait_seconds = registry.register(
+    Histogram(
+        "upstream_queue_wait_seconds",
+        "Time spent waiting for an upstream rate limit / concurrency slot",
+        ("sitename",),
+        buckets=LATENCY_BUCKETS,
+    )
+)
+upstream_requests_in_flight = registry.register(
+    Gauge(
+        "upstream_requests_in_flight",
+        "Upstream API requests in flight",
+        ("apiurlname", "sitename"),
+    )
+)
+db_query_duration_seconds = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Repository method latency",
+        ("repository", "method"),
+        buckets=DB_BUCKETS,
+    )
+)
+cache_requests_total = registry.register(
+    Counter(
+        "cache_requests_total",
+        "Cache lookups by result (hit, miss, expired)",
+        ("cache", "result"),
+    )
+)
+
+
+def _cache_hit_ratio() -> dict[tuple, float]:
+    totals: dict[str, float] = {}
+    hits: dict[str, float] = {}
+    for (cache, result), value in cache_requests_total.items():
+        totals[cache] = totals.get(cache, 0) + value
+        if result == "hit":
+            hits[cache] = hits.get(cache, 0) + value
+    return {
+        (cache,): hits.get(cache, 0) / total for cache, total in totals.items() if total
+    }
+
+
+registry.register(
+    CallbackGauge(
+        "cache_hit_ratio",
+        "Cache hit ratio since start",
+        _cache_hit_ratio,
+        ("cache",),
+    )
+)
+
+
+def is_enabled() -> bool:
+    return get_server_options().metrics.enabled
+
+
+def time_repository_methods(cls):
+    """
+    クラスデコレータ。publicなasyncメソッドの所要時間を
+    db_query_duration_seconds{repository, method} に記録する。
+    """
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func):
+            continue
+        setattr(cls, name, _timed(func, cls.__name__, name))
+    return cls
+
+
+def _timed(func, repository: str, method: str):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            db_query_duration_seconds.observe(
+                time.perf_counter() - start, repository, method
+            )
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ルート(パスのテンプレート)毎のリクエスト数とレイテンシを記録する。
+    ルートに一致しないパスは"unmatched"にまとめ、ラベルの種類が増えないようにする。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not is_enabled():
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, path, str(status_code))
+            http_request_duration_seconds.observe(
+                time.perf_counter() - start, method, path
+            )
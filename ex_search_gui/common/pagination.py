@@ -0,0 +1,67 @@
+import base64
+from typing import Literal, Sequence
+
+from pydantic import BaseModel
+
+OrderBy = Literal["id", "label_name"]
+
+
+class PageCursor(BaseModel):
+    """キーセットページングの位置。最後に返した行の並び替えキーを持つ"""
+
+    order_by: OrderBy = "id"
+    id: int
+    label_name: str | None = None
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    raw = cursor.model_dump_json(exclude_none=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str, order_by: OrderBy) -> PageCursor:
+    """不正なカーソルや並び順が異なるカーソルはValueErrorとする"""
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        cursor = PageCursor.model_validate_json(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor ,{value}") from e
+    if cursor.order_by != order_by:
+        raise ValueError(f"cursor is for order_by={cursor.order_by}")
+    if order_by == "label_name" and cursor.label_name is None:
+        raise ValueError(f"invalid cursor ,{value}")
+    return cursor
+
+
+def split_page(rows: Sequence, limit: int | None, order_by: OrderBy):
+    """
+    limit+1件取得した結果を受け取り、(ページの行, 次ページのカーソル) を返す。
+    次ページが無ければカーソルはNone。
+    """
+    if limit is None or len(rows) <= limit:
+        return list(rows), None
+    page = list(rows[:limit])
+    last = page[-1]
+    cursor = PageCursor(
+        order_by=order_by,
+        id=last.id,
+        label_name=last.label_name if order_by == "label_name" else None,
+    )
+    return page, encode_cursor(cursor)
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> set[str] | None:
+    """カンマ区切りの項目名を検証する。idは常に含める"""
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(model.model_fields)
+    if unknown:
+        raise ValueError(f"unknown fields ,{sorted(unknown)}")
+    return names | {"id"}
+
+
+def dump_fields(items: Sequence[BaseModel], fields: set[str] | None) -> list:
+    if fields is None:
+        return list(items)
+    return [item.model_dump(mode="json", include=fields) for item in items]
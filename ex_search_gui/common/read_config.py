@@ -1,38 +1,128 @@
-from pydantic import BaseModel, Field
+import importlib
+import os
+from datetime import datetime, timezone
+from typing import Literal
+
+from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
 
 import settings
 
 
-class APISiteOption(BaseModel):
-    timeout: float = Field(default=10.0)
+class ConfigModel(BaseModel):
+    """設定値は読み込み後に変更しない"""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class APILimitOption(ConfigModel):
+    rate: float | None = Field(default=None, gt=0)  # requests per second
+    burst: int = Field(default=1, ge=1)
+    max_in_flight: int | None = Field(default=None, ge=1)
+
+
+class APISiteOption(APILimitOption):
+    timeout: float | None = Field(default=None)
+
+
+class APIClientOption(ConfigModel):
+    max_connections: int | None = Field(default=100)
+    max_keepalive_connections: int | None = Field(default=20)
+    keepalive_expiry: float | None = Field(default=5.0)
+    http2: bool = Field(default=False)
+    compression: bool = Field(default=True)
 
 
-class APIOtpion(BaseModel):
+class APICircuitBreakerOption(ConfigModel):
+    enabled: bool = Field(default=True)
+    failure_threshold: int = Field(default=5, ge=1)
+    cooldown: float = Field(default=60.0, ge=0)  # seconds
+
+
+class APIOtpion(ConfigModel):
+    """サイト毎の設定(timeout, rate等)はサイト名をキーとして追加で指定する"""
+
+    model_config = ConfigDict(extra="allow")
+
     url: str
     timeout: float = Field(default=5.0)
+    client: APIClientOption = Field(default_factory=APIClientOption)
+    download_types: dict[str, APILimitOption] = Field(default_factory=dict)
+    circuit_breaker: APICircuitBreakerOption = Field(
+        default_factory=APICircuitBreakerOption
+    )
     gemini: APISiteOption | None = Field(default=None)
 
+    @model_validator(mode="after")
+    def validate_site_options(self):
+        for sitename, value in (self.model_extra or {}).items():
+            if isinstance(value, dict):
+                self.model_extra[sitename] = APISiteOption(**value)
+        return self
+
+    def get_site_option(self, sitename: str) -> APISiteOption | None:
+        if sitename == "gemini":
+            return self.gemini
+        value = (self.model_extra or {}).get(sitename)
+        if isinstance(value, APISiteOption):
+            return value
+        return None
+
+
+class SearchOption(ConfigModel):
+    max_concurrency: int = Field(default=5, ge=1)
+    preview_concurrent: bool = Field(default=True)
+    preview_max_concurrency: int = Field(default=4, ge=1)
 
-class APIOptions(BaseModel):
+
+class SearchCacheOption(ConfigModel):
+    enabled: bool = Field(default=True)
+    ttl: float = Field(default=600.0)
+    max_entries: int = Field(default=1000, ge=1)
+    max_bytes: int = Field(default=50 * 1024 * 1024, ge=1)
+    # ラベル名またはサイト名(download_configのsitename)毎のTTL。0ならキャッシュしない
+    label_ttl: dict[str, float] = Field(default_factory=dict)
+    site_ttl: dict[str, float] = Field(default_factory=dict)
+
+    @field_validator("label_ttl", "site_ttl")
+    @classmethod
+    def validate_ttl(cls, v: dict[str, float]):
+        for name, ttl in v.items():
+            if ttl < 0:
+                raise ValueError(f"ttl must be >= 0 ,{name}")
+        return v
+
+
+class SearchHistoryOption(ConfigModel):
+    enabled: bool = Field(default=True)
+    batch_size: int = Field(default=500, ge=1)
+    flush_interval: float = Field(default=1.0, gt=0)  # seconds
+    max_queue_size: int = Field(default=10000, ge=1)
+
+
+class APIOptions(ConfigModel):
     get_data: APIOtpion
+    search: SearchOption = Field(default_factory=SearchOption)
+    cache: SearchCacheOption = Field(default_factory=SearchCacheOption)
+    history: SearchHistoryOption = Field(default_factory=SearchHistoryOption)
 
 
-class SearchToKakakuOption(BaseModel):
+class SearchToKakakuOption(ConfigModel):
     registration: bool = Field(default=False)
     url: str
 
 
-class KakakuScrapingOption(BaseModel):
+class KakakuScrapingOption(ConfigModel):
     enabled: bool = Field(default=False)
     url: str
 
 
-class HTMLOptions(BaseModel):
+class HTMLOptions(ConfigModel):
+    page_size: int = Field(default=100, ge=1)  # 一覧ページの1ページの件数
     search2kakaku: SearchToKakakuOption
     kakakuscraping: KakakuScrapingOption
 
 
-class SQLParams(BaseModel):
+class SQLParams(ConfigModel):
     drivername: str
     database: str
     username: str | None = None
@@ -41,13 +131,70 @@ class SQLParams(BaseModel):
     port: str | None = None
 
 
-class DataBaseOptions(BaseModel):
+class SQLitePragmaOptions(ConfigModel):
+    """Noneの項目はSQLiteのデフォルトのまま"""
+
+    journal_mode: (
+        Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] | None
+    ) = Field(default=None)
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] | None = Field(default=None)
+    mmap_size: int | None = Field(default=None, ge=0)
+    cache_size: int | None = Field(default=None)
+    temp_store: Literal["DEFAULT", "FILE", "MEMORY"] | None = Field(default=None)
+    busy_timeout: int | None = Field(default=None, ge=0)  # ms
+
+    @field_validator("journal_mode", "synchronous", "temp_store", mode="before")
+    @classmethod
+    def validate_upper(cls, v):
+        if isinstance(v, str):
+            return v.upper()
+        return v
+
+
+class DataBaseOptions(ConfigModel):
     sync: SQLParams
     a_sync: SQLParams
+    sqlite_pragmas: SQLitePragmaOptions = Field(default_factory=SQLitePragmaOptions)
+
+
+class LogRotationOption(ConfigModel):
+    max_bytes: int = Field(default=10 * 1024 * 1024, ge=0)
+    interval: float | None = Field(default=24 * 60 * 60, gt=0)  # seconds
+    backup_count: int = Field(default=7, ge=0)
+    compress: bool = Field(default=True)
+
+
+class LogTruncateOption(ConfigModel):
+    max_string_length: int = Field(default=1000, ge=1)
+    max_items: int = Field(default=50, ge=1)
+    max_depth: int = Field(default=5, ge=1)
+
 
+class LogSamplingOption(ConfigModel):
+    info_rate: float = Field(default=1.0, ge=0, le=1)
+    events: dict[str, float] = Field(default_factory=dict)
 
-class LogOptions(BaseModel):
+    @field_validator("events")
+    @classmethod
+    def validate_events(cls, v: dict[str, float]) -> dict[str, float]:
+        for event, rate in v.items():
+            if not 0 <= rate <= 1:
+                raise ValueError(f"sampling rate must be 0-1 ,{event}={rate}")
+        return v
+
+    def get_rate(self, event: str, level: str) -> float:
+        """WARNING以上は間引かない"""
+        if level not in ("debug", "info"):
+            return 1.0
+        return self.events.get(event.lower(), self.info_rate)
+
+
+class LogOptions(ConfigModel):
     directory_path: str
+    queue_size: int = Field(default=10000, ge=1)
+    rotation: LogRotationOption = Field(default_factory=LogRotationOption)
+    truncate: LogTruncateOption = Field(default_factory=LogTruncateOption)
+    sampling: LogSamplingOption = Field(default_factory=LogSamplingOption)
 
 
 def to_lower_keys(obj):
@@ -66,21 +213,113 @@ def to_lower_keys(obj):
         return obj
 
 
+class CompressionOption(ConfigModel):
+    enabled: bool = Field(default=True)
+    minimum_size: int = Field(default=1024, ge=0)  # bytes
+    encodings: list[Literal["zstd", "br", "gzip"]] = Field(
+        default_factory=lambda: ["zstd", "br", "gzip"]
+    )
+    gzip_level: int = Field(default=6, ge=1, le=9)
+    brotli_quality: int = Field(default=4, ge=0, le=11)
+    zstd_level: int = Field(default=3, ge=1, le=22)
+
+
+class MetricsOption(ConfigModel):
+    enabled: bool = Field(default=True)
+
+
+class TracingOption(ConfigModel):
+    enabled: bool = Field(default=True)
+    sample_rate: float = Field(default=1.0, ge=0, le=1)
+    filename: str = Field(default="trace.jsonl")
+
+
+class ServerOptions(ConfigModel):
+    compression: CompressionOption = Field(default_factory=CompressionOption)
+    metrics: MetricsOption = Field(default_factory=MetricsOption)
+    tracing: TracingOption = Field(default_factory=TracingOption)
+
+
+class ConfigOptions(ConfigModel):
+    reload_on_signal: bool = Field(default=True)
+    watch_file: bool = Field(default=False)
+    watch_interval: float = Field(default=5.0, gt=0)  # seconds
+
+
+class ConfigSnapshot(ConfigModel):
+    api_options: APIOptions
+    html_options: HTMLOptions
+    databases: DataBaseOptions
+    log_options: LogOptions
+    server_options: ServerOptions
+    config_options: ConfigOptions
+    version: int = 1
+    loaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+_snapshot: ConfigSnapshot | None = None
+
+
+def _build_snapshot(version: int = 1) -> ConfigSnapshot:
+    return ConfigSnapshot(
+        api_options=APIOptions(**to_lower_keys(settings.API_OPTIONS)),
+        html_options=HTMLOptions(**to_lower_keys(settings.HTML_OPTIONS)),
+        databases=DataBaseOptions(**to_lower_keys(settings.DATABASES)),
+        log_options=LogOptions(**to_lower_keys(settings.LOG_OPTIONS)),
+        server_options=ServerOptions(
+            **to_lower_keys(getattr(settings, "SERVER_OPTIONS", {}))
+        ),
+        config_options=ConfigOptions(
+            **to_lower_keys(getattr(settings, "CONFIG_OPTIONS", {}))
+        ),
+        version=version,
+    )
+
+
+def get_config() -> ConfigSnapshot:
+    """検証済みの設定スナップショットを返す(初回呼び出し時に読み込む)"""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = _build_snapshot()
+    return _snapshot
+
+
+def reload_config() -> ConfigSnapshot:
+    """
+    settings.pyを再読み込みしてスナップショットを差し替える。
+    検証に失敗した場合は例外を送出し、現在のスナップショットを維持する。
+    DB接続やHTTPクライアントの接続プール設定は再起動するまで反映されない。
+    """
+    global _snapshot
+    importlib.reload(settings)
+    current = get_config()
+    _snapshot = _build_snapshot(version=current.version + 1)
+    return _snapshot
+
+
+def get_settings_path() -> str:
+    return os.path.abspath(settings.__file__)
+
+
 def get_api_options():
-    lower_key_dict = to_lower_keys(settings.API_OPTIONS)
-    return APIOptions(**lower_key_dict)
+    return get_config().api_options
 
 
 def get_html_options():
-    lower_key_dict = to_lower_keys(settings.HTML_OPTIONS)
-    return HTMLOptions(**lower_key_dict)
+    return get_config().html_options
 
 
 def get_databases():
-    lower_key_dict = to_lower_keys(settings.DATABASES)
-    return DataBaseOptions(**lower_key_dict)
+    return get_config().databases
 
 
 def get_log_options():
-    lower_key_dict = to_lower_keys(settings.LOG_OPTIONS)
-    return LogOptions(**lower_key_dict)
+    return get_config().log_options
+
+
+def get_server_options():
+    return get_config().server_options
+
+
+def get_config_options():
+    return get_config().config_options
@@ -0,0 +1,27 @@
+import inspect
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+
+class OrjsonResponse(JSONResponse):
+    """orjsonでシリアライズするJSONレスポンス。dictのキーはstr以外も可"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+# 新しいFastAPIはresponse_modelをPydanticで直接JSONバイト列にする(dump_json)。
+# その場合にresponse_classを指定すると遅い経路になるため、古いFastAPIのみ使う
+FASTAPI_DUMPS_JSON = "dump_json" in inspect.signature(serialize_response).parameters
+
+
+def default_response_class_options() -> dict:
+    """APIRouterに渡すdefault_response_classの指定"""
+    if FASTAPI_DUMPS_JSON:
+        return {}
+    return {"default_response_class": OrjsonResponse}
@@ -0,0 +1,283 @@
+import functools
+import inspect
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.read_config import get_log_options, get_server_options
+
+# W3C Trace Contextのtraceparent: version-trace_id-parent_id-flags
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class SpanContext:
+    """親スパンの情報(traceparentで受け取った呼び出し元を含む)"""
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+class Span:
+    def __init__(
+        self, name: str, parent: SpanContext | None, attributes: dict[str, Any]
+    ):
+        self.name = name
+        if parent is None:
+            self.trace_id = os.urandom(16).hex()
+            self.parent_id = None
+            self.sampled = random.random() < get_server_options().tracing.sample_rate
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        self.span_id = os.urandom(8).hex()
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: str | None = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: float | None = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id, self.sampled)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException | str):
+        self.status = "error"
+        if isinstance(error, BaseException):
+            error = f"{type(error).__name__}: {error}"
+        self.error = error
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+        if self.sampled:
+            get_exporter().export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _SpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return orjson.dumps(
+            record.msg.to_dict(), option=orjson.OPT_NON_STR_KEYS, default=str
+        ).decode("utf-8")
+
+
+class JsonlSpanExporter:
+    """
+    終了したスパンを1行1スパンのJSONでファイルに出力する。
+    ログと同じくキュー経由で別スレッドから書き込み、ローテーションも同じ設定を使う。
+    """
+
+    def __init__(self, file_path: str, queue_size: int):
+        from common.logger_config import (
+            DroppingQueueHandler,
+            SizedTimedRotatingFileHandler,
+        )
+
+        handler = SizedTimedRotatingFileHandler(file_path, get_log_options().rotation)
+        handler.setFormatter(_SpanFormatter())
+        span_queue = queue.Queue(maxsize=queue_size)
+        self._queue_handler = DroppingQueueHandler(span_queue)
+        self._listener = logging.handlers.QueueListener(span_queue, handler)
+        self._listener.start()
+
+    def export(self, span: Span):
+        record = logging.LogRecord(
+            name=__name__,
+            level=logging.INFO,
+            pathname=__file__,
+            lineno=0,
+            msg=span,
+            args=None,
+            exc_info=None,
+        )
+        self._queue_handler.enqueue(record)
+
+    def shutdown(self):
+        self._listener.stop()
+
+
+_exporter: JsonlSpanExporter | None = None
+
+
+def get_exporter() -> JsonlSpanExporter:
+    global _exporter
+    if _exporter is None:
+        logoptions = get_log_options()
+        _exporter = JsonlSpanExporter(
+            file_path=os.path.join(
+                logoptions.directory_path, get_server_options().tracing.filename
+            ),
+            queue_size=logoptions.queue_size,
+        )
+    return _exporter
+
+
+def shutdown_exporter():
+    """キューに残っているスパンを出力してから出力スレッドを止める"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+def is_enabled() -> bool:
+    return get_server_options().tracing.enabled
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, parent: SpanContext | None = None, **attributes):
+    """
+    スパンを開始する。parentを省略すると現在のスパンの子になる。
+    トレースが無効な場合はNoneを返す。
+    """
+    if not is_enabled():
+        yield None
+        return
+    if parent is None:
+        current = _current_span.get()
+        parent = current.context if current else None
+    span = Span(name, parent, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def traced(name: str | None = None):
+    """関数の呼び出しをスパンで囲むデコレータ(async/同期どちらも可)"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_repository_methods(cls):
+    """クラスデコレータ。publicなasyncメソッドを "{クラス名}.{メソッド名}" のスパンで囲む"""
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func):
+            continue
+        setattr(cls, name, traced(f"{cls.__name__}.{name}")(func))
+    return cls
+
+
+def make_traceparent(span: Span | None = None) -> str | None:
+    """上流への呼び出しに付けるtraceparentヘッダーの値"""
+    span = span or _current_span.get()
+    if span is None:
+        return None
+    flags = "01" if span.sampled else "00"
+    return f"00-{span.trace_id}-{span.span_id}-{flags}"
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    if not value:
+        return None
+    matched = TRACEPARENT_RE.match(value.strip().lower())
+    if matched is None:
+        return None
+    trace_id, span_id, flags = matched.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+def add_trace_context(logger, method_name: str, event_dict: dict) -> dict:
+    """structlogのプロセッサ。現在のスパンのtrace_id/span_idをログに含める"""
+    span = _current_span.get()
+    if span is not None:
+        event_dict.setdefault("trace_id", span.trace_id)
+        event_dict.setdefault("span_id", span.span_id)
+    return event_dict
+
+
+class TracingMiddleware:
+    """
+    リクエスト毎にルートのスパンを作る。traceparentヘッダーがあれば呼び出し元のトレースを継続する。
+    レスポンスにはX-Trace-Idヘッダーでtrace_idを返す。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not is_enabled():
+            await self.app(scope, receive, send)
+            return
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        with start_span(
+            f"{scope['method']} {scope['path']}",
+            parent=parent,
+            **{"http.method": scope["method"], "http.path": scope["path"]},
+        ) as span:
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_error(f"status {message['status']}")
+                    MutableHeaders(scope=message)["X-Trace-Id"] = span.trace_id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+                    span.set_attribute("http.route", route)
@@ -1,6 +1,9 @@
 from domain.models.search import search
 from . import util as db_util
+from .search import fts, generated
 
 
 def create_table():
     db_util.create_db_and_tables()
+    generated.add_generated_columns(db_util.get_engine())
+    fts.create_fts_tables(db_util.get_engine())
@@ -0,0 +1,123 @@
+import sqlite3
+
+import structlog
+from sqlalchemy import Engine, text, table, column, literal_column
+from sqlalchemy.exc import OperationalError
+
+# FTS5のtrigramトークナイザはSQLite 3.34.0以上が必要
+TRIGRAM_MIN_SQLITE_VERSION = (3, 34, 0)
+# trigramで検索できる最小の文字数。これより短い語はLIKEで検索する
+MIN_MATCH_LENGTH = 3
+
+FTS_TABLES = {
+    "searchurlconfig_fts": {
+        "content": "searchurlconfig",
+        "columns": ["label_name", "base_url"],
+    },
+    "productpageconfig_fts": {
+        "content": "productpageconfig",
+        "columns": ["label_name", "url_pattern"],
+    },
+}
+
+_enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _create_statements(fts_name: str, content: str, columns: list[str]) -> list[str]:
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    insert_new = f"INSERT INTO {fts_name}(rowid, {cols}) VALUES (new.id, {new_cols});"
+    delete_old = (
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_cols});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5("
+        f"{cols}, content='{content}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {content} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {content} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE OF {cols} "
+        f"ON {content} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def create_fts_tables(engine: Engine):
+    """
+    ラベル検索用のFTS5仮想テーブルと同期用トリガーを作成する。
+    作成できない環境(SQLite以外、古いSQLite)ではLIKE検索のままにする。
+    """
+    global _enabled
+    log = structlog.get_logger(__name__)
+    if engine.dialect.name != "sqlite":
+        return
+    if sqlite3.sqlite_version_info < TRIGRAM_MIN_SQLITE_VERSION:
+        log.warning(
+            "fts5 trigram is not supported, use LIKE search",
+            sqlite_version=sqlite3.sqlite_version,
+        )
+        return
+    try:
+        with engine.begin() as conn:
+            for fts_name, fts_opt in FTS_TABLES.items():
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"),
+                    {"n": fts_name},
+                ).first()
+                for stmt in _create_statements(fts_name=fts_name, **fts_opt):
+                    conn.execute(text(stmt))
+                if not exists:
+                    # 既存の行を索引に取り込む
+                    conn.execute(
+                        text(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')")
+                    )
+    except OperationalError as e:
+        log.warning("failed to create fts5 tables, use LIKE search", error=str(e))
+        return
+    _enabled = True
+
+
+def quote_term(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_query(column_terms: dict[str, str | None]) -> str | None:
+    """trigramで検索できる語だけを列指定のMATCH式にする"""
+    parts = [
+        f"{col} : {quote_term(term)}"
+        for col, term in column_terms.items()
+        if term and len(term) >= MIN_MATCH_LENGTH
+    ]
+    if not parts:
+        return None
+    return " AND ".join(parts)
+
+
+def apply_match(stmt, model, fts_name: str, column_terms: dict[str, str | None]):
+    """
+    FTSで絞り込み、関連度(bm25)順に並べた文と、
+    FTSで扱えずLIKEで絞り込む必要がある列名のリストを返す。
+    """
+    if not _enabled:
+        return stmt, [col for col, term in column_terms.items() if term]
+    match_query = build_match_query(column_terms)
+    like_columns = [
+        col
+        for col, term in column_terms.items()
+        if term and len(term) < MIN_MATCH_LENGTH
+    ]
+    if match_query is None:
+        return stmt, like_columns
+    fts = table(fts_name, column("rowid"), column("rank"))
+    stmt = (
+        stmt.join(fts, fts.c.rowid == model.id)
+        .where(literal_column(fts_name).op("MATCH")(match_query))
+        .order_by(fts.c.rank)
+    )
+    return stmt, like_columns
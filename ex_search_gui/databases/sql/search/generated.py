@@ -0,0 +1,40 @@
+import structlog
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn
+
+from domain.models.search import search as m_search
+
+# 生成列(download_configから取り出す値)を持つテーブル
+GENERATED_COLUMN_MODELS = [m_search.SearchURLConfig, m_search.ProductPageConfig]
+
+
+def add_generated_columns(engine: Engine):
+    """
+    create_allでは既存テーブルに列が追加されないため、
+    足りない生成列をALTER TABLE ADD COLUMN(VIRTUAL)で追加し、インデックスを作成する。
+    """
+    log = structlog.get_logger(__name__)
+    if engine.dialect.name != "sqlite":
+        return
+    try:
+        with engine.begin() as conn:
+            for model in GENERATED_COLUMN_MODELS:
+                table = model.__table__
+                # 生成列はtable_infoには出ないためtable_xinfoで確認する
+                existing = {
+                    row[1]
+                    for row in conn.execute(text(f"PRAGMA table_xinfo({table.name})"))
+                }
+                for column in table.columns:
+                    if column.computed is None or column.name in existing:
+                        continue
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    log.info(
+                        "add generated column", table=table.name, column=column.name
+                    )
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+    except OperationalError as e:
+        log.warning("failed to add generated columns", error=str(e))
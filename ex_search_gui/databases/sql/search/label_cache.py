@@ -0,0 +1,124 @@
+import copy
+import uuid
+
+from domain.models.search import search as m_search
+
+
+class LabelCache:
+    """
+    SearchURLConfig と Group / グループ所属をメモリ上に保持するキャッシュ。
+    起動時に読み込み、リポジトリの更新系メソッドからwrite-throughで更新する。
+    返すインスタンスはセッション外の共有オブジェクトなので変更しないこと。
+    更新の度に version が増える。instance_id はプロセス毎に異なる。
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.version = 0
+        self.instance_id = uuid.uuid4().hex[:8]
+        self._labels: dict[int, m_search.SearchURLConfig] = {}
+        self._groups: dict[int, m_search.Group] = {}
+        self._group_labels: dict[int, set[int]] = {}
+
+    def build(
+        self,
+        labels: list[m_search.SearchURLConfig],
+        groups: list[m_search.Group],
+        links: list[m_search.GroupLabelLink],
+    ):
+        self._labels = {label.id: self._copy_label(label) for label in labels}
+        self._groups = {group.id: self._copy_group(group) for group in groups}
+        self._group_labels = {group.id: set() for group in groups}
+        for link in links:
+            if link.group_id in self._group_labels:
+                self._group_labels[link.group_id].add(link.label_id)
+        self.loaded = True
+        self.version += 1
+
+    def get_label(self, label_id: int) -> m_search.SearchURLConfig | None:
+        return self._labels.get(label_id)
+
+    def get_labels(
+        self,
+        id: int | None = None,
+        ids: list[int] | None = None,
+        download_type: str | None = None,
+    ) -> list[m_search.SearchURLConfig]:
+        if id:
+            labels = [self._labels[id]] if id in self._labels else []
+        elif ids is not None:
+            labels = [self._labels[i] for i in sorted(set(ids)) if i in self._labels]
+        else:
+            labels = [self._labels[i] for i in sorted(self._labels)]
+        if download_type:
+            labels = [label for label in labels if label.download_type == download_type]
+        return labels
+
+    def get_group(self, group_id: int) -> m_search.Group | None:
+        return self._groups.get(group_id)
+
+    def get_groups(self) -> list[m_search.Group]:
+        return [self._groups[i] for i in sorted(self._groups)]
+
+    def get_labels_for_group(self, group_id: int) -> list[m_search.SearchURLConfig]:
+        label_ids = self._group_labels.get(group_id, set())
+        return [self._labels[i] for i in sorted(label_ids) if i in self._labels]
+
+    def upsert_label(self, label: m_search.SearchURLConfig):
+        if not self.loaded:
+            return
+        self._labels[label.id] = self._copy_label(label)
+        self.version += 1
+
+    def remove_label(self, label_id: int):
+        if not self.loaded:
+            return
+        self._labels.pop(label_id, None)
+        for label_ids in self._group_labels.values():
+            label_ids.discard(label_id)
+        self.version += 1
+
+    def upsert_group(self, group: m_search.Group):
+        if not self.loaded:
+            return
+        self._groups[group.id] = self._copy_group(group)
+        self._group_labels.setdefault(group.id, set())
+        self.version += 1
+
+    def remove_group(self, group_id: int):
+        if not self.loaded:
+            return
+        self._groups.pop(group_id, None)
+        self._group_labels.pop(group_id, None)
+        self.version += 1
+
+    def add_link(self, group_id: int, label_id: int):
+        if not self.loaded:
+            return
+        self._group_labels.setdefault(group_id, set()).add(label_id)
+        self.version += 1
+
+    def remove_link(self, group_id: int, label_id: int):
+        if not self.loaded:
+            return
+        self._group_labels.get(group_id, set()).discard(label_id)
+        self.version += 1
+
+    def set_group_labels(self, group_id: int, label_ids: set[int]):
+        if not self.loaded:
+            return
+        self._group_labels[group_id] = set(label_ids)
+        self.version += 1
+
+    @staticmethod
+    def _copy_label(label: m_search.SearchURLConfig) -> m_search.SearchURLConfig:
+        data = label.model_dump()
+        data["download_config"] = copy.deepcopy(dict(data["download_config"] or {}))
+        return m_search.SearchURLConfig(**data)
+
+    @staticmethod
+    def _copy_group(group: m_search.Group) -> m_search.Group:
+        return m_search.Group(**group.model_dump())
+
+
+label_cache = LabelCache()
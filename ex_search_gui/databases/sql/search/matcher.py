@@ -0,0 +1,168 @@
+import copy
+import re
+import string
+
+import structlog
+
+from domain.models.search import search as m_search
+
+# SQLiteのLIKEと同様にASCII文字のみ大文字小文字を区別しない
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+# LIKEのワイルドカード。url_pattern中の _ は任意の1文字、% は任意の0文字以上
+_ANY_CHAR = "_"
+_ANY_RUN = "%"
+
+
+class _TrieNode:
+    __slots__ = ("children", "config_ids", "any_run")
+
+    def __init__(self, any_run: bool = False):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.config_ids: list[int] = []
+        # % の辺で到達したノードは任意の文字を読んでも留まる
+        self.any_run = any_run
+
+
+class ProductPageURLMatcher:
+    """
+    ProductPageConfigのurl_patternをメモリ上に展開したマッチャー。
+    prefixは LIKE url_pattern || '%' と同じ一致(_ と % はワイルドカード)を
+    トライ木で調べ、url_patternが最も長いもの(同じ長さならID順)を返す。
+    regexはコンパイル済みパターンをID順に評価する。
+    返す ProductPageConfig は毎回新しく生成したセッション外のインスタンス。
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._root = _TrieNode()
+        self._regexes: dict[int, re.Pattern] = {}
+        self._configs: dict[int, dict] = {}
+
+    def build(self, configs: list[m_search.ProductPageConfig]):
+        self._root = _TrieNode()
+        self._regexes = {}
+        self._configs = {}
+        for config in configs:
+            self._add(config)
+        self.loaded = True
+
+    def upsert(self, config: m_search.ProductPageConfig):
+        if not self.loaded:
+            return
+        self.remove(config.id)
+        self._add(config)
+        if config.id in self._regexes:
+            # 評価順(ID順)を保つ
+            self._regexes = dict(sorted(self._regexes.items()))
+
+    def remove(self, config_id: int):
+        if not self.loaded:
+            return
+        data = self._configs.pop(config_id, None)
+        if data is None:
+            return
+        self._regexes.pop(config_id, None)
+        if data["pattern_type"] == "prefix":
+            node = self._find_node(data["url_pattern"].translate(_ASCII_LOWER))
+            if node is not None and config_id in node.config_ids:
+                node.config_ids.remove(config_id)
+
+    def match(self, url: str) -> m_search.ProductPageConfig | None:
+        config_id = self._match_prefix(url)
+        if config_id is None:
+            config_id = self._match_regex(url)
+        if config_id is None:
+            return None
+        return m_search.ProductPageConfig(**copy.deepcopy(self._configs[config_id]))
+
+    def _add(self, config: m_search.ProductPageConfig):
+        data = config.model_dump()
+        data["download_config"] = copy.deepcopy(dict(data["download_config"] or {}))
+        match config.pattern_type:
+            case "prefix":
+                node = self._root
+                for char in config.url_pattern.translate(_ASCII_LOWER):
+                    child = node.children.get(char)
+                    if child is None:
+                        child = _TrieNode(any_run=char == _ANY_RUN)
+                        node.children[char] = child
+                    node = child
+                node.config_ids.append(config.id)
+                node.config_ids.sort()
+            case "regex":
+                try:
+                    self._regexes[config.id] = re.compile(config.url_pattern)
+                except re.error as e:
+                    log = structlog.get_logger(__name__)
+                    log.warning(
+                        "invalid url_pattern regex",
+                        id=config.id,
+                        url_pattern=config.url_pattern,
+                        error=str(e),
+                    )
+                    return
+            case _:
+                return
+        self._configs[config.id] = data
+
+    def _find_node(self, pattern: str) -> _TrieNode | None:
+        node = self._root
+        for char in pattern:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _closure(nodes: list[_TrieNode]) -> list[_TrieNode]:
+        """% は0文字にも一致するので、% の子ノードも現在位置に含める"""
+        result = []
+        seen = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            result.append(node)
+            child = node.children.get(_ANY_RUN)
+            if child is not None:
+                stack.append(child)
+        return result
+
+    def _match_prefix(self, url: str) -> int | None:
+        best: tuple[int, int] | None = None
+
+        def update(nodes: list[_TrieNode]):
+            nonlocal best
+            for node in nodes:
+                for config_id in node.config_ids:
+                    key = (-len(self._configs[config_id]["url_pattern"]), config_id)
+                    if best is None or key < best:
+                        best = key
+
+        nodes = self._closure([self._root])
+        update(nodes)
+        for char in url.translate(_ASCII_LOWER):
+            next_nodes = []
+            for node in nodes:
+                if node.any_run:
+                    next_nodes.append(node)
+                for key in (char, _ANY_CHAR):
+                    child = node.children.get(key)
+                    if child is not None:
+                        next_nodes.append(child)
+            if not next_nodes:
+                break
+            nodes = self._closure(next_nodes)
+            update(nodes)
+        return best[1] if best is not None else None
+
+    def _match_regex(self, url: str) -> int | None:
+        for config_id, pattern in self._regexes.items():
+            if pattern.match(url):
+                return config_id
+        return None
+
+
+product_page_url_matcher = ProductPageURLMatcher()
@@ -1,7 +1,9 @@
-import re
+from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, bindparam
+from sqlalchemy import select, insert, delete, func, tuple_
+from sqlalchemy.orm import defer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import List, Optional
 
 from domain.models.search import (
@@ -9,8 +11,134 @@ from domain.models.search import (
     command as search_command,
     repository as search_repo,
 )
+from common.metrics import time_repository_methods
+from common.tracing import trace_repository_methods
+from .matcher import product_page_url_matcher
+from .label_cache import label_cache
+from . import fts
 
 
+async def _bulk_upsert(ses: AsyncSession, model: type[m_search.SQLBase], configs: list):
+    """
+    既存idの確認をIN検索1回で行い、INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    でまとめて保存する。保存後のid/created_at/updated_atと生成列はconfigsに反映する。
+    """
+    if not configs:
+        return
+    ids = [config.id for config in configs if config.id]
+    if ids:
+        result = await ses.execute(select(model.id).where(model.id.in_(ids)))
+        found_ids = set(result.scalars().all())
+        for id in ids:
+            if id not in found_ids:
+                raise ValueError(f"not found config.id ,{id}")
+
+    table = model.__table__
+    now = datetime.now(timezone.utc)
+    columns = [
+        column.name
+        for column in table.columns
+        if column.computed is None and column.name not in ("created_at", "updated_at")
+    ]
+    computed_columns = [column for column in table.columns if column.computed]
+    rows = [
+        {name: getattr(config, name) for name in columns}
+        | {"created_at": config.created_at or now, "updated_at": now}
+        for config in configs
+    ]
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={
+            name: stmt.excluded[name]
+            for name in columns + ["updated_at"]
+            if name != "id"
+        },
+    ).returning(
+        table.c.id,
+        table.c.created_at,
+        table.c.updated_at,
+        *computed_columns,
+        sort_by_parameter_order=True,
+    )
+    result = await ses.execute(stmt, rows)
+    saved_rows = result.all()
+    await ses.commit()
+    for config, saved_row in zip(configs, saved_rows):
+        config.id = saved_row.id
+        config.created_at = saved_row.created_at
+        config.updated_at = saved_row.updated_at
+        for column in computed_columns:
+            setattr(config, column.name, saved_row._mapping[column])
+
+
+def _is_paged(command) -> bool:
+    return (
+        command.limit is not None
+        or command.after_id is not None
+        or command.order_by != "id"
+    )
+
+
+def _apply_keyset(stmt, model, command):
+    """
+    キーセットページング。(label_name, id) または id の順に並べ、
+    直前のページの最後の行より後ろをlimit件取得する。
+    ページング指定が無い場合は元の並び順(FTSの関連度順など)のまま全件返す。
+    """
+    if not _is_paged(command):
+        return stmt
+    if command.order_by == "label_name":
+        if command.after_id is not None:
+            stmt = stmt.where(
+                tuple_(model.label_name, model.id)
+                > tuple_(command.after_label_name, command.after_id)
+            )
+        stmt = stmt.order_by(None).order_by(model.label_name, model.id)
+    else:
+        if command.after_id is not None:
+            stmt = stmt.where(model.id > command.after_id)
+        stmt = stmt.order_by(None).order_by(model.id)
+    if command.limit is not None:
+        stmt = stmt.limit(command.limit)
+    return stmt
+
+
+def _filter_config(stmt, model, command):
+    """download_configの生成列(インデックス付き)での絞り込み"""
+    if command.sitename:
+        stmt = stmt.where(model.sitename == command.sitename)
+    if command.config_label:
+        stmt = stmt.where(model.config_label == command.config_label)
+    if command.recreate_parser is not None:
+        stmt = stmt.where(model.recreate_parser.is_(command.recreate_parser))
+    return stmt
+
+
+def _config_options(stmt, model, command):
+    if not command.include_config:
+        stmt = stmt.options(defer(model.download_config, raiseload=True))
+    return stmt
+
+
+def _page_in_memory(rows: list, command) -> list:
+    """キャッシュから取得した(id順の)一覧に_apply_keysetと同じ絞り込みを行う"""
+    if not _is_paged(command):
+        return rows
+    if command.order_by == "label_name":
+        rows = sorted(rows, key=lambda row: (row.label_name, row.id))
+        if command.after_id is not None:
+            after = (command.after_label_name, command.after_id)
+            rows = [row for row in rows if (row.label_name, row.id) > after]
+    elif command.after_id is not None:
+        rows = [row for row in rows if row.id > command.after_id]
+    if command.limit is not None:
+        rows = rows[: command.limit]
+    return rows
+
+
+@time_repository_methods
+@trace_repository_methods
 class SearchURLConfigRepositorySQL(search_repo.SearchURLConfigRepository):
     session: AsyncSession
 
@@ -18,49 +146,72 @@ class SearchURLConfigRepositorySQL(search_repo.SearchURLConfigRepository):
         self.session = ses
 
     async def save_all(self, configs: list[m_search.SearchURLConfig]):
-        ses = self.session
-        saved_configs = []
+        await _bulk_upsert(self.session, m_search.SearchURLConfig, configs)
         for config in configs:
-            if not config.id:
-                ses.add(config)
-                saved_configs.append(config)
-                continue
-            db_config: m_search.SearchURLConfig = await ses.get(
-                m_search.SearchURLConfig, config.id
-            )
-            if not db_config:
-                raise ValueError(f"not found config.id ,{config.id}")
-            db_config.label_name = config.label_name
-            db_config.base_url = config.base_url
-            db_config.query = config.query
-            db_config.query_encoding = config.query_encoding
-            db_config.download_type = config.download_type
-            db_config.download_config = config.download_config
-            saved_configs.append(db_config)
-        await ses.commit()
-        for saved_config in saved_configs:
-            await ses.refresh(saved_config)
+            label_cache.upsert_label(config)
 
     async def get_all(
         self, command: search_command.SearchURLConfigCommand
     ) -> list[m_search.SearchURLConfig]:
-        stmt = select(m_search.SearchURLConfig)
+        if self._use_cache(command):
+            labels = label_cache.get_labels(
+                id=command.id, ids=command.ids, download_type=command.download_type
+            )
+            return _page_in_memory(labels, command)
+        stmt = self._filter(select(m_search.SearchURLConfig), command)
+        stmt = _apply_keyset(stmt, m_search.SearchURLConfig, command)
+        stmt = _config_options(stmt, m_search.SearchURLConfig, command)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def count(self, command: search_command.SearchURLConfigCommand) -> int:
+        if self._use_cache(command):
+            return len(
+                label_cache.get_labels(
+                    id=command.id,
+                    ids=command.ids,
+                    download_type=command.download_type,
+                )
+            )
+        stmt = self._filter(select(m_search.SearchURLConfig.id), command)
+        result = await self.session.execute(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    def _use_cache(command: search_command.SearchURLConfigCommand) -> bool:
+        return (
+            label_cache.loaded
+            and not command.label_name
+            and not command.base_url
+            and not command.sitename
+            and not command.config_label
+            and command.recreate_parser is None
+        )
+
+    @staticmethod
+    def _filter(stmt, command: search_command.SearchURLConfigCommand):
         if command.id:
             stmt = stmt.where(m_search.SearchURLConfig.id == command.id)
-        if command.label_name:
-            stmt = stmt.where(
-                m_search.SearchURLConfig.label_name.icontains(command.label_name)
-            )
-        if command.base_url:
+        if command.ids is not None:
+            stmt = stmt.where(m_search.SearchURLConfig.id.in_(command.ids))
+        column_terms = {"label_name": command.label_name, "base_url": command.base_url}
+        stmt, like_columns = fts.apply_match(
+            stmt,
+            model=m_search.SearchURLConfig,
+            fts_name="searchurlconfig_fts",
+            column_terms=column_terms,
+        )
+        for col in like_columns:
             stmt = stmt.where(
-                m_search.SearchURLConfig.base_url.icontains(command.base_url)
+                getattr(m_search.SearchURLConfig, col).icontains(column_terms[col])
             )
         if command.download_type:
             stmt = stmt.where(
                 m_search.SearchURLConfig.download_type == command.download_type
             )
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return _filter_config(stmt, m_search.SearchURLConfig, command)
 
     async def delete_by_id(self, id: int):
         ses = self.session
@@ -71,9 +222,12 @@ class SearchURLConfigRepositorySQL(search_repo.SearchURLConfigRepository):
             raise ValueError(f"not found config.id ,{id}")
         await ses.delete(db_config)
         await ses.commit()
+        label_cache.remove_label(id)
         return
 
 
+@time_repository_methods
+@trace_repository_methods
 class ProductPageConfigRepositorySQL(search_repo.ProductPageConfigRepository):
     session: AsyncSession
 
@@ -81,48 +235,49 @@ class ProductPageConfigRepositorySQL(search_repo.ProductPageConfigRepository):
         self.session = ses
 
     async def save_all(self, configs: list[m_search.ProductPageConfig]):
-        ses = self.session
-        saved_configs = []
+        await _bulk_upsert(self.session, m_search.ProductPageConfig, configs)
         for config in configs:
-            if not config.id:
-                ses.add(config)
-                saved_configs.append(config)
-                continue
-            db_config: m_search.ProductPageConfig = await ses.get(
-                m_search.ProductPageConfig, config.id
-            )
-            if not db_config:
-                raise ValueError(f"not found config.id ,{config.id}")
-            db_config.label_name = config.label_name
-            db_config.url_pattern = config.url_pattern
-            db_config.pattern_type = config.pattern_type
-            db_config.download_type = config.download_type
-            db_config.download_config = config.download_config
-            saved_configs.append(db_config)
-        await ses.commit()
-        for saved_config in saved_configs:
-            await ses.refresh(saved_config)
+            product_page_url_matcher.upsert(config)
 
     async def get_all(
         self, command: search_command.ProductPageConfigCommand
     ) -> list[m_search.ProductPageConfig]:
-        stmt = select(m_search.ProductPageConfig)
+        stmt = self._filter(select(m_search.ProductPageConfig), command)
+        stmt = _apply_keyset(stmt, m_search.ProductPageConfig, command)
+        stmt = _config_options(stmt, m_search.ProductPageConfig, command)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def count(self, command: search_command.ProductPageConfigCommand) -> int:
+        stmt = self._filter(select(m_search.ProductPageConfig.id), command)
+        result = await self.session.execute(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    def _filter(stmt, command: search_command.ProductPageConfigCommand):
         if command.id:
             stmt = stmt.where(m_search.ProductPageConfig.id == command.id)
-        if command.label_name:
-            stmt = stmt.where(
-                m_search.ProductPageConfig.label_name.icontains(command.label_name)
-            )
-        if command.url_pattern:
+        column_terms = {
+            "label_name": command.label_name,
+            "url_pattern": command.url_pattern,
+        }
+        stmt, like_columns = fts.apply_match(
+            stmt,
+            model=m_search.ProductPageConfig,
+            fts_name="productpageconfig_fts",
+            column_terms=column_terms,
+        )
+        for col in like_columns:
             stmt = stmt.where(
-                m_search.ProductPageConfig.url_pattern.icontains(command.url_pattern)
+                getattr(m_search.ProductPageConfig, col).icontains(column_terms[col])
             )
         if command.download_type:
             stmt = stmt.where(
                 m_search.ProductPageConfig.download_type == command.download_type
             )
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return _filter_config(stmt, m_search.ProductPageConfig, command)
 
     async def delete_by_id(self, id: int):
         ses = self.session
@@ -133,8 +288,11 @@ class ProductPageConfigRepositorySQL(search_repo.ProductPageConfigRepository):
             raise ValueError(f"not found config.id ,{id}")
         await ses.delete(db_config)
         await ses.commit()
+        product_page_url_matcher.remove(id)
 
 
+@time_repository_methods
+@trace_repository_methods
 class ProductPageURLPatternRepositorySQL(search_repo.ProductPageURLPatternRepository):
     def __init__(self, ses: AsyncSession):
         self.session = ses
@@ -142,32 +300,23 @@ class ProductPageURLPatternRepositorySQL(search_repo.ProductPageURLPatternReposi
     async def find_best_match(
         self, command: search_command.ProductPageURLPatternCommand
     ) -> m_search.ProductPageConfig | None:
-        input_url_param = bindparam("input_url_val", value=command.url)
-        prefix_pattern = (
-            select(m_search.ProductPageConfig)
-            .where(m_search.ProductPageConfig.pattern_type == "prefix")
-            .where(input_url_param.like(m_search.ProductPageConfig.url_pattern + "%"))
-        )
-        prefix_pattern_result = await self.session.execute(prefix_pattern)
-        if prefix_pattern_result:
-            best_match = max(
-                prefix_pattern_result.scalars(),
-                key=lambda x: len(x.url_pattern),
-                default=None,
-            )
-            if best_match:
-                return best_match
+        if not product_page_url_matcher.loaded:
+            await self.load_matcher()
+        return product_page_url_matcher.match(command.url)
 
-        regex_pattern = select(m_search.ProductPageConfig).where(
-            m_search.ProductPageConfig.pattern_type == "regex"
+    async def load_matcher(self):
+        """全ProductPageConfigからURLマッチャーを構築する"""
+        stmt = (
+            select(m_search.ProductPageConfig)
+            .where(m_search.ProductPageConfig.pattern_type.in_(["prefix", "regex"]))
+            .order_by(m_search.ProductPageConfig.id)
         )
-        regex_pattern_result = await self.session.execute(regex_pattern)
-        for db_config in regex_pattern_result.scalars():
-            if re.match(db_config.url_pattern, command.url):
-                return db_config
-        return None
+        result = await self.session.execute(stmt)
+        product_page_url_matcher.build(result.scalars().all())
 
 
+@time_repository_methods
+@trace_repository_methods
 class GroupRepository(search_repo.GroupRepository):
     """Repository for Group and its related operations."""
 
@@ -190,6 +339,7 @@ class GroupRepository(search_repo.GroupRepository):
         self.session.add(group)
         await self.session.commit()
         await self.session.refresh(group)
+        label_cache.upsert_group(group)
         return group
 
     async def get_group_by_id(self, group_id: int) -> Optional[m_search.Group]:
@@ -200,6 +350,8 @@ class GroupRepository(search_repo.GroupRepository):
         Returns:
             見つかったGroupインスタンス、またはNone
         """
+        if label_cache.loaded:
+            return label_cache.get_group(group_id)
         result = await self.session.get(m_search.Group, group_id)
         return result
 
@@ -209,6 +361,8 @@ class GroupRepository(search_repo.GroupRepository):
         Returns:
             すべてのGroupインスタンスのリスト
         """
+        if label_cache.loaded:
+            return label_cache.get_groups()
         statement = select(m_search.Group)
         result = await self.session.execute(statement)
         return result.scalars().all()
@@ -230,6 +384,7 @@ class GroupRepository(search_repo.GroupRepository):
         db_group.name = new_name
         await self.session.commit()
         await self.session.refresh(db_group)
+        label_cache.upsert_group(db_group)
         return db_group
 
     async def delete_group(self, group_id: int) -> bool:
@@ -245,6 +400,7 @@ class GroupRepository(search_repo.GroupRepository):
             return False
         await self.session.delete(db_group)
         await self.session.commit()
+        label_cache.remove_group(group_id)
         return True
 
     async def add_label_to_group(
@@ -268,6 +424,7 @@ class GroupRepository(search_repo.GroupRepository):
         self.session.add(link)
         await self.session.commit()
         await self.session.refresh(link)
+        label_cache.add_link(group_id, label_id)
         return link
 
     async def remove_label_from_group(self, group_id: int, label_id: int) -> bool:
@@ -279,12 +436,15 @@ class GroupRepository(search_repo.GroupRepository):
             return False
         await self.session.delete(link)
         await self.session.commit()
+        label_cache.remove_link(group_id, label_id)
         return True
 
     async def get_labels_for_group(
         self, group_id: int
     ) -> List[m_search.SearchURLConfig]:
         """特定のグループに紐づくすべてのラベルを取得"""
+        if label_cache.loaded:
+            return label_cache.get_labels_for_group(group_id)
         statement = (
             select(m_search.SearchURLConfig)
             .join(m_search.GroupLabelLink)
@@ -292,3 +452,225 @@ class GroupRepository(search_repo.GroupRepository):
         )
         result = await self.session.execute(statement)
         return result.scalars().all()
+
+    async def set_labels_for_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        """
+        グループの所属ラベルをlabel_idsで置き換える(1トランザクション)
+        Returns:
+            置き換え後の所属ラベルIDのリスト、グループが無い場合はNone
+        """
+        if not await self._exists_group(group_id):
+            return None
+        label_ids = await self._validate_label_ids(label_ids)
+        await self.session.execute(
+            delete(m_search.GroupLabelLink).where(
+                m_search.GroupLabelLink.group_id == group_id,
+                m_search.GroupLabelLink.label_id.not_in(label_ids),
+            )
+        )
+        await self._insert_links(group_id, label_ids)
+        await self.session.commit()
+        label_cache.set_group_labels(group_id, set(label_ids))
+        return label_ids
+
+    async def add_labels_to_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        """
+        グループに複数のラベルをまとめて追加する(既に所属しているものは無視)
+        Returns:
+            追加後の所属ラベルIDのリスト、グループが無い場合はNone
+        """
+        if not await self._exists_group(group_id):
+            return None
+        label_ids = await self._validate_label_ids(label_ids)
+        await self._insert_links(group_id, label_ids)
+        await self.session.commit()
+        return await self._refresh_group_labels(group_id)
+
+    async def remove_labels_from_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        """
+        グループから複数のラベルをまとめて外す(所属していないものは無視)
+        Returns:
+            削除後の所属ラベルIDのリスト、グループが無い場合はNone
+        """
+        if not await self._exists_group(group_id):
+            return None
+        if label_ids:
+            await self.session.execute(
+                delete(m_search.GroupLabelLink).where(
+                    m_search.GroupLabelLink.group_id == group_id,
+                    m_search.GroupLabelLink.label_id.in_(label_ids),
+                )
+            )
+            await self.session.commit()
+        return await self._refresh_group_labels(group_id)
+
+    async def get_groups_with_label_count(self) -> List[tuple[m_search.Group, int]]:
+        """すべてのグループと所属ラベル数を1回の集計で取得"""
+        if label_cache.loaded:
+            return [
+                (group, len(label_cache.get_labels_for_group(group.id)))
+                for group in label_cache.get_groups()
+            ]
+        statement = (
+            select(m_search.Group, func.count(m_search.SearchURLConfig.id))
+            .outerjoin(
+                m_search.GroupLabelLink,
+                m_search.GroupLabelLink.group_id == m_search.Group.id,
+            )
+            .outerjoin(
+                m_search.SearchURLConfig,
+                m_search.SearchURLConfig.id == m_search.GroupLabelLink.label_id,
+            )
+            .group_by(m_search.Group.id)
+            .order_by(m_search.Group.id)
+        )
+        result = await self.session.execute(statement)
+        return [(group, count) for group, count in result.all()]
+
+    async def get_label_memberships(
+        self, group_id: int
+    ) -> List[tuple[m_search.SearchURLConfig, bool]]:
+        """すべてのラベルと、指定グループに所属しているかどうかを取得"""
+        if label_cache.loaded:
+            member_ids = {
+                label.id for label in label_cache.get_labels_for_group(group_id)
+            }
+            return [
+                (label, label.id in member_ids) for label in label_cache.get_labels()
+            ]
+        statement = (
+            select(
+                m_search.SearchURLConfig,
+                m_search.GroupLabelLink.group_id.is_not(None),
+            )
+            .outerjoin(
+                m_search.GroupLabelLink,
+                (m_search.GroupLabelLink.label_id == m_search.SearchURLConfig.id)
+                & (m_search.GroupLabelLink.group_id == group_id),
+            )
+            .order_by(m_search.SearchURLConfig.id)
+        )
+        result = await self.session.execute(statement)
+        return [(label, bool(in_group)) for label, in_group in result.all()]
+
+    async def _exists_group(self, group_id: int) -> bool:
+        if label_cache.loaded:
+            return label_cache.get_group(group_id) is not None
+        return await self.session.get(m_search.Group, group_id) is not None
+
+    async def _validate_label_ids(self, label_ids: list[int]) -> list[int]:
+        """存在しないラベルIDがあればValueErrorを投げる"""
+        label_ids = sorted(set(label_ids))
+        if not label_ids:
+            return label_ids
+        result = await self.session.execute(
+            select(m_search.SearchURLConfig.id).where(
+                m_search.SearchURLConfig.id.in_(label_ids)
+            )
+        )
+        missing = set(label_ids) - set(result.scalars().all())
+        if missing:
+            raise ValueError(f"not found label.id ,{sorted(missing)}")
+        return label_ids
+
+    async def _insert_links(self, group_id: int, label_ids: list[int]):
+        if not label_ids:
+            return
+        now = datetime.now(timezone.utc)
+        stmt = sqlite_insert(m_search.GroupLabelLink.__table__).on_conflict_do_nothing(
+            index_elements=["group_id", "label_id"]
+        )
+        await self.session.execute(
+            stmt,
+            [
+                {
+                    "group_id": group_id,
+                    "label_id": label_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for label_id in label_ids
+            ],
+        )
+
+    async def _refresh_group_labels(self, group_id: int) -> list[int]:
+        result = await self.session.execute(
+            select(m_search.GroupLabelLink.label_id)
+            .where(m_search.GroupLabelLink.group_id == group_id)
+            .order_by(m_search.GroupLabelLink.label_id)
+        )
+        label_ids = list(result.scalars().all())
+        label_cache.set_group_labels(group_id, set(label_ids))
+        return label_ids
+
+
+@time_repository_methods
+@trace_repository_methods
+class SearchResultHistoryRepositorySQL(search_repo.SearchResultHistoryRepository):
+    def __init__(self, ses: AsyncSession):
+        self.session = ses
+
+    async def add_all(self, rows: list[dict]):
+        """1トランザクションでまとめて挿入する(executemany)"""
+        if not rows:
+            return
+        await self.session.execute(insert(m_search.SearchResultHistory), rows)
+        await self.session.commit()
+
+    async def get_all(
+        self, command: search_command.SearchResultHistoryCommand
+    ) -> list[m_search.SearchResultHistory]:
+        stmt = select(m_search.SearchResultHistory)
+        if command.label_id is not None:
+            stmt = stmt.where(m_search.SearchResultHistory.label_id == command.label_id)
+        if command.keyword is not None:
+            stmt = stmt.where(m_search.SearchResultHistory.keyword == command.keyword)
+        if command.url is not None:
+            stmt = stmt.where(m_search.SearchResultHistory.url == command.url)
+        if command.since is not None:
+            stmt = stmt.where(m_search.SearchResultHistory.fetched_at >= command.since)
+        if command.until is not None:
+            stmt = stmt.where(m_search.SearchResultHistory.fetched_at < command.until)
+        stmt = stmt.order_by(
+            m_search.SearchResultHistory.fetched_at.desc(),
+            m_search.SearchResultHistory.id.desc(),
+        ).limit(command.limit)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+
+async def get_catalog_version(ses: AsyncSession) -> str:
+    """
+    ラベル/グループ/グループ所属のいずれかが変わると変わる値。ETagの元にする。
+    キャッシュ読み込み済みならそのバージョン、未読み込みなら各テーブルの
+    件数と最終更新日時から作る。
+    """
+    if label_cache.loaded:
+        return f"cache:{label_cache.instance_id}:{label_cache.version}"
+    parts = []
+    for model in (m_search.SearchURLConfig, m_search.Group, m_search.GroupLabelLink):
+        result = await ses.execute(select(func.count(), func.max(model.updated_at)))
+        count, updated_at = result.one()
+        parts.append(f"{count}:{updated_at}")
+    return "db:" + ":".join(parts)
+
+
+async def load_caches(ses: AsyncSession):
+    """起動時にラベル/グループのキャッシュとURLマッチャーを構築する"""
+    labels = await ses.execute(
+        select(m_search.SearchURLConfig).order_by(m_search.SearchURLConfig.id)
+    )
+    groups = await ses.execute(select(m_search.Group).order_by(m_search.Group.id))
+    links = await ses.execute(select(m_search.GroupLabelLink))
+    label_cache.build(
+        labels=labels.scalars().all(),
+        groups=groups.scalars().all(),
+        links=links.scalars().all(),
+    )
+    await ProductPageURLPatternRepositorySQL(ses).load_matcher()
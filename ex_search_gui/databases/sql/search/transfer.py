@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from common.metrics import time_repository_methods
+from common.tracing import trace_repository_methods
+from domain.models.search import search as m_search
+
+# NDJSONの"type"とテーブルの対応。エクスポートはこの順に出力する
+TRANSFER_MODELS: dict[str, type[SQLModel]] = {
+    "label": m_search.SearchURLConfig,
+    "product_label": m_search.ProductPageConfig,
+    "group": m_search.Group,
+    "group_label": m_search.GroupLabelLink,
+}
+
+
+@time_repository_methods
+@trace_repository_methods
+class SearchConfigTransferRepositorySQL:
+    """ラベル/商品ラベル/グループ/グループ所属の一括入出力"""
+
+    session: AsyncSession
+
+    def __init__(self, ses: AsyncSession):
+        self.session = ses
+
+    async def iter_rows(
+        self, kind: str, chunk_size: int = 500
+    ) -> AsyncIterator[SQLModel]:
+        """chunk_size件ずつ読み出す。全件をメモリに載せない"""
+        model = TRANSFER_MODELS[kind]
+        stmt = (
+            select(model)
+            .order_by(*model.__table__.primary_key.columns)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.session.stream_scalars(stmt)
+        async for row in result:
+            yield row
+
+    async def upsert_chunk(self, kind: str, rows: list[dict]):
+        """
+        idがあれば ON CONFLICT で更新、なければ新規作成する。
+        コミットはしないので呼び出し側でまとめてコミットすること。
+        """
+        if not rows:
+            return
+        model = TRANSFER_MODELS[kind]
+        table = model.__table__
+        now = datetime.now(timezone.utc)
+        if kind == "group_label":
+            stmt = sqlite_insert(table).on_conflict_do_nothing(
+                index_elements=["group_id", "label_id"]
+            )
+            await self.session.execute(
+                stmt,
+                [{**row, "created_at": now, "updated_at": now} for row in rows],
+            )
+            return
+
+        with_id = [{**row, "updated_at": now} for row in rows if row.get("id")]
+        without_id = [
+            {k: v for k, v in row.items() if k != "id"} | {"updated_at": now}
+            for row in rows
+            if not row.get("id")
+        ]
+        if with_id:
+            stmt = sqlite_insert(table)
+            update_columns = {
+                key: stmt.excluded[key] for key in with_id[0].keys() if key != "id"
+            }
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["id"], set_=update_columns
+            )
+            await self.session.execute(
+                stmt, [{**row, "created_at": now} for row in with_id]
+            )
+        if without_id:
+            await self.session.execute(
+                sqlite_insert(table),
+                [{**row, "created_at": now} for row in without_id],
+            )
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, create_engine
-from sqlalchemy import URL
+from sqlalchemy import URL, event, text
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -20,6 +20,20 @@ if "sqlite" in databases.sync.drivername or "sqlite" in databases.a_sync.drivern
 engine = create_engine(sync_db_params, **sub_params)
 
 async_engine = create_async_engine(async_db_params, **sub_params)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    pragmas = databases.sqlite_pragmas.model_dump(exclude_none=True)
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+if "sqlite" in databases.sync.drivername:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+if "sqlite" in databases.a_sync.drivername:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 aSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_engine)
 
 
@@ -43,3 +57,15 @@ def get_engine():
 
 def get_async_engine():
     return async_engine
+
+
+async def get_sqlite_pragmas() -> dict:
+    """非同期エンジンの接続で実際に有効になっているPRAGMAの値を返す"""
+    if "sqlite" not in databases.a_sync.drivername:
+        return {}
+    pragmas = {}
+    async with async_engine.connect() as conn:
+        for name in type(databases.sqlite_pragmas).model_fields:
+            result = await conn.execute(text(f"PRAGMA {name}"))
+            pragmas[name] = result.scalar()
+    return pragmas
@@ -1,11 +1,26 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
 
 class SearchURLConfigCommand(BaseModel):
     id: int | None = None
+    ids: list[int] | None = None
     label_name: str | None = None
     base_url: str | None = None
     download_type: str | None = None
+    # download_configの生成列での絞り込み
+    sitename: str | None = None
+    config_label: str | None = None
+    recreate_parser: bool | None = None
+    # Falseならdownload_configを読み込まない(デコードしない)
+    include_config: bool = True
+    # キーセットページング。after_*は直前のページの最後の行の値
+    order_by: Literal["id", "label_name"] = "id"
+    after_id: int | None = None
+    after_label_name: str | None = None
+    limit: int | None = None
 
 
 class ProductPageConfigCommand(BaseModel):
@@ -14,7 +29,26 @@ class ProductPageConfigCommand(BaseModel):
     url_pattern: str | None = None
     pattern_type: str | None = None
     download_type: str | None = None
+    # download_configの生成列での絞り込み
+    sitename: str | None = None
+    config_label: str | None = None
+    recreate_parser: bool | None = None
+    # Falseならdownload_configを読み込まない(デコードしない)
+    include_config: bool = True
+    order_by: Literal["id", "label_name"] = "id"
+    after_id: int | None = None
+    after_label_name: str | None = None
+    limit: int | None = None
 
 
 class ProductPageURLPatternCommand(BaseModel):
     url: str
+
+
+class SearchResultHistoryCommand(BaseModel):
+    label_id: int | None = None
+    keyword: str | None = None
+    url: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    limit: int = 100
@@ -1,10 +1,17 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
-from .search import SearchURLConfig, ProductPageConfig, Group, GroupLabelLink
+from .search import (
+    SearchURLConfig,
+    ProductPageConfig,
+    Group,
+    GroupLabelLink,
+    SearchResultHistory,
+)
 from .command import (
     SearchURLConfigCommand,
     ProductPageConfigCommand,
     ProductPageURLPatternCommand,
+    SearchResultHistoryCommand,
 )
 
 
@@ -17,6 +24,10 @@ class SearchURLConfigRepository(ABC):
     async def get_all(self, command: SearchURLConfigCommand) -> list[SearchURLConfig]:
         pass
 
+    @abstractmethod
+    async def count(self, command: SearchURLConfigCommand) -> int:
+        pass
+
     @abstractmethod
     async def delete_by_id(self, id: int):
         pass
@@ -33,6 +44,10 @@ class ProductPageConfigRepository(ABC):
     ) -> list[ProductPageConfig]:
         pass
 
+    @abstractmethod
+    async def count(self, command: ProductPageConfigCommand) -> int:
+        pass
+
     @abstractmethod
     async def delete_by_id(self, id: int):
         pass
@@ -78,3 +93,43 @@ class GroupRepository(ABC):
     @abstractmethod
     async def get_labels_for_group(self, group_id: int) -> List[SearchURLConfig]:
         pass
+
+    @abstractmethod
+    async def set_labels_for_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        pass
+
+    @abstractmethod
+    async def add_labels_to_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        pass
+
+    @abstractmethod
+    async def remove_labels_from_group(
+        self, group_id: int, label_ids: list[int]
+    ) -> Optional[list[int]]:
+        pass
+
+    @abstractmethod
+    async def get_groups_with_label_count(self) -> List[tuple[Group, int]]:
+        pass
+
+    @abstractmethod
+    async def get_label_memberships(
+        self, group_id: int
+    ) -> List[tuple[SearchURLConfig, bool]]:
+        pass
+
+
+class SearchResultHistoryRepository(ABC):
+    @abstractmethod
+    async def add_all(self, rows: list[dict]):
+        pass
+
+    @abstractmethod
+    async def get_all(
+        self, command: SearchResultHistoryCommand
+    ) -> List[SearchResultHistory]:
+        pass
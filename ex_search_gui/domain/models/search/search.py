@@ -1,13 +1,18 @@
-import json
+import sqlite3
 
+import orjson
 from sqlmodel import Field, Relationship
-from sqlalchemy import Column, event
+from sqlalchemy import Boolean, Column, Computed, Index, String, event, func
 from sqlalchemy.orm import Mapper
 from sqlalchemy.types import TypeDecorator, VARCHAR
 from sqlalchemy.ext.mutable import MutableDict
 
 from domain.models.base_model import SQLBase, SQLModel, datetime, timezone
 
+# JSONBはSQLite 3.45.0以上。それ未満はJSONテキストのまま保存する
+JSONB_MIN_SQLITE_VERSION = (3, 45, 0)
+USE_JSONB = sqlite3.sqlite_version_info >= JSONB_MIN_SQLITE_VERSION
+
 
 class JSONEncodedDictNoEnsureAscii(TypeDecorator):
     """Represents an immutable structure as a json-encoded string.
@@ -16,24 +21,49 @@ class JSONEncodedDictNoEnsureAscii(TypeDecorator):
 
         JSONEncodedDict(255)
 
+    JSONB対応のSQLiteではjsonb()で保存し、json()でテキストに戻して読む。
+    json()はテキストのJSONも受け付けるので、移行前の行もそのまま読める。
     """
 
     impl = VARCHAR
 
     cache_ok = True
 
+    def bind_expression(self, bindvalue):
+        if USE_JSONB:
+            return func.jsonb(bindvalue, type_=self)
+        return bindvalue
+
+    def column_expression(self, col):
+        if USE_JSONB:
+            return func.json(col, type_=self)
+        return col
+
     def process_bind_param(self, value, dialect):
         if value is not None:
-            value = json.dumps(value, ensure_ascii=False)
+            value = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
 
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
-            value = json.loads(value)
+            value = orjson.loads(value)
         return value
 
 
+def config_column(name: str, key: str, type_=String) -> Column:
+    """
+    download_config[key]を取り出す仮想の生成列(インデックス付き)。
+    値はDBが計算するため、保存時には指定しない。
+    """
+    return Column(
+        name,
+        type_,
+        Computed(f"json_extract(download_config, '$.{key}')", persisted=False),
+        index=True,
+    )
+
+
 class SearchURLConfig(SQLBase, table=True):
     label_name: str = Field(index=True)
     base_url: str
@@ -44,6 +74,17 @@ class SearchURLConfig(SQLBase, table=True):
         default_factory=dict,
         sa_column=Column(MutableDict.as_mutable(JSONEncodedDictNoEnsureAscii())),
     )
+    # download_configの生成列。labelはlabel_nameと紛らわしいためconfig_labelとする
+    sitename: str | None = Field(
+        default=None, sa_column=config_column("sitename", "sitename")
+    )
+    config_label: str | None = Field(
+        default=None, sa_column=config_column("config_label", "label")
+    )
+    recreate_parser: bool | None = Field(
+        default=None,
+        sa_column=config_column("recreate_parser", "recreate_parser", Boolean),
+    )
     # Relationships
     groups_link: list["GroupLabelLink"] = Relationship(back_populates="label")
 
@@ -85,3 +126,38 @@ class ProductPageConfig(SQLBase, table=True):
         default_factory=dict,
         sa_column=Column(MutableDict.as_mutable(JSONEncodedDictNoEnsureAscii())),
     )
+    # download_configの生成列。labelはlabel_nameと紛らわしいためconfig_labelとする
+    sitename: str | None = Field(
+        default=None, sa_column=config_column("sitename", "sitename")
+    )
+    config_label: str | None = Field(
+        default=None, sa_column=config_column("config_label", "label")
+    )
+    recreate_parser: bool | None = Field(
+        default=None,
+        sa_column=config_column("recreate_parser", "recreate_parser", Boolean),
+    )
+
+
+class SearchResultHistory(SQLModel, table=True):
+    """ラベル検索で取得した検索結果の履歴(1行1商品)"""
+
+    __table_args__ = (
+        Index(
+            "ix_searchresulthistory_label_id_keyword_fetched_at",
+            "label_id",
+            "keyword",
+            "fetched_at",
+        ),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    label_id: int
+    keyword: str
+    fetched_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    title: str | None = None
+    price: int | None = None
+    url: str | None = Field(default=None, index=True)
+    stock_msg: str | None = None
+    stock_quantity: int | None = None
+    is_success: bool = Field(default=False)
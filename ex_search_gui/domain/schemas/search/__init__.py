@@ -7,7 +7,9 @@ from .search import (
     SearchResults,
     SearchURLConfigPreviewResponse,
     SearchByLabelRequest,
+    SearchByLabelsRequest,
     SearchByLabelResponse,
+    SearchByLabelStreamItem,
     ProductPageConfigPreviewRequest,
     ProductPageConfigPreviewResponse,
     ProductLabelResponse,
@@ -18,6 +20,19 @@ from .search import (
     GroupUpdate,
     GroupResponse,
     GroupDetailResponse,
+    GroupSummaryResponse,
+    GroupLabelIdsRequest,
+    GroupLabelIdsResponse,
+    GroupLabelMembershipResponse,
+    SearchResultHistoryResponse,
+    TransferRecord,
+    TransferLabel,
+    TransferProductLabel,
+    TransferGroup,
+    TransferGroupLabel,
+    TransferImportError,
+    TransferImportResponse,
+    CountResponse,
     GeneralSuccessResponse,
 )
 
@@ -30,7 +45,9 @@ __all__ = [
     "SearchResults",
     "SearchURLConfigPreviewResponse",
     "SearchByLabelRequest",
+    "SearchByLabelsRequest",
     "SearchByLabelResponse",
+    "SearchByLabelStreamItem",
     "ProductPageConfigPreviewRequest",
     "ProductPageConfigPreviewResponse",
     "ProductLabelResponse",
@@ -41,5 +58,18 @@ __all__ = [
     "GroupUpdate",
     "GroupResponse",
     "GroupDetailResponse",
+    "GroupSummaryResponse",
+    "GroupLabelIdsRequest",
+    "GroupLabelIdsResponse",
+    "GroupLabelMembershipResponse",
+    "SearchResultHistoryResponse",
+    "TransferRecord",
+    "TransferLabel",
+    "TransferProductLabel",
+    "TransferGroup",
+    "TransferGroupLabel",
+    "TransferImportError",
+    "TransferImportResponse",
+    "CountResponse",
     "GeneralSuccessResponse",
 ]
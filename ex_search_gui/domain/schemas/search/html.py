@@ -10,6 +10,7 @@ from typing import Annotated, Union
 
 class SearchLabels(BaseModel):
     labels: list[SearchURLConfigSchema] = Field(default_factory=list)
+    next_cursor: str | None = None
 
 
 class SearchLabelAddForm(BaseModel):
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any, Optional, Literal
 from urllib.parse import urlparse
 
@@ -75,6 +76,8 @@ class SearchResult(BaseModel):
 class SearchResults(BaseModel):
     results: list[SearchResult] = Field(default_factory=list)
     error_msg: str = Field(default="")
+    from_cache: bool = Field(default=False)
+    cache_age: float | None = Field(default=None)  # seconds
 
 
 class SearchURLConfigPreviewResponse(BaseModel):
@@ -84,12 +87,25 @@ class SearchURLConfigPreviewResponse(BaseModel):
 class SearchByLabelRequest(BaseModel):
     keyword: str
     label_id: int
+    use_cache: bool = True
+
+
+class SearchByLabelsRequest(BaseModel):
+    keyword: str
+    label_ids: list[int] = Field(default_factory=list)
+    group_id: int | None = None
+    use_cache: bool = True
 
 
 class SearchByLabelResponse(BaseModel):
     results: dict[int, SearchResults] = Field(default_factory=dict)
 
 
+class SearchByLabelStreamItem(BaseModel):
+    label_id: int
+    result: SearchResults | None = None
+
+
 class ProductPageConfig(BaseModel):
     id: int | None = None
     label_name: str
@@ -148,5 +164,76 @@ class GroupDetailResponse(GroupResponse):
     labels: list[SearchURLConfigSchema] = []
 
 
+class GroupSummaryResponse(GroupResponse):
+    label_count: int = 0
+
+
+class GroupLabelIdsRequest(BaseModel):
+    label_ids: list[int] = Field(default_factory=list)
+
+
+class GroupLabelIdsResponse(BaseModel):
+    success: bool
+    group_id: int
+    label_ids: list[int] = Field(default_factory=list)
+
+
+class GroupLabelMembershipResponse(SearchLabelResponse):
+    in_group: bool = False
+
+
+class SearchResultHistoryResponse(BaseModel):
+    id: int
+    label_id: int
+    keyword: str
+    fetched_at: datetime
+    title: str | None = None
+    price: int | None = None
+    url: str | None = None
+    stock_msg: str | None = None
+    stock_quantity: int | None = None
+    is_success: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Import/Export (NDJSON) related schemas
+class TransferRecord(BaseModel):
+    type: Literal["label", "product_label", "group", "group_label"]
+    data: dict
+
+
+class TransferLabel(SearchURLConfigSchema):
+    pass
+
+
+class TransferProductLabel(ProductPageConfig):
+    pass
+
+
+class TransferGroup(GroupBase):
+    id: int | None = None
+
+
+class TransferGroupLabel(BaseModel):
+    group_id: int
+    label_id: int
+
+
+class TransferImportError(BaseModel):
+    line: int
+    error: str
+
+
+class TransferImportResponse(BaseModel):
+    success: bool
+    counts: dict[str, int] = Field(default_factory=dict)
+    errors: list[TransferImportError] = Field(default_factory=list)
+
+
+class CountResponse(BaseModel):
+    count: int
+
+
 class GeneralSuccessResponse(BaseModel):
     success: bool
@@ -1,14 +1,24 @@
 from contextlib import asynccontextmanager
 
+import structlog
+
 from fastapi import FastAPI, status, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 
 
 from routers.api import search as api_search
 from routers.html import search as html_search
 from databases.sql.create_table import create_table
+from databases.sql.util import aSessionLocal, get_sqlite_pragmas
+from databases.sql.search.repository import load_caches
+from app import getdata
+from app.search.history import search_history_writer
+from app.label.add import SearchLabelDownLoadConfigTemplateService
 from common.logger_config import configure_logger
+from common.config_reload import ConfigReloader
+from common.compression import CompressionMiddleware
+from common import metrics, tracing
 
 configure_logger(filename="app.log", logging_level="INFO")
 
@@ -16,10 +26,28 @@ configure_logger(filename="app.log", logging_level="INFO")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_table()
-    yield
+    SearchLabelDownLoadConfigTemplateService.precompute()
+    log = structlog.get_logger(__name__)
+    log.info("sqlite pragmas", **await get_sqlite_pragmas())
+    async with aSessionLocal() as ses:
+        await load_caches(ses)
+    await getdata.open_client()
+    await search_history_writer.start()
+    config_reloader = ConfigReloader()
+    await config_reloader.start()
+    try:
+        yield
+    finally:
+        await config_reloader.stop()
+        await search_history_writer.stop()
+        await getdata.close_client()
+        tracing.shutdown_exporter()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -33,3 +61,11 @@ async def root(request: Request):
         url=request.url_for("read_search"),
         status_code=status.HTTP_302_FOUND,
     )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus形式のメトリクス"""
+    if not metrics.is_enabled():
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
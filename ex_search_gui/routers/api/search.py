@@ -1,10 +1,12 @@
 import uuid
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
-from databases.sql.util import get_async_session
+from databases.sql.util import get_async_session, aSessionLocal
 from domain.models.search import command as search_command, search as search_model
 from domain.schemas.search import (
     SearchLabelResponse,
@@ -13,6 +15,7 @@ from domain.schemas.search import (
     SearchURLConfigPreviewRequest,
     SearchURLConfigPreviewResponse,
     SearchByLabelRequest,
+    SearchByLabelsRequest,
     SearchByLabelResponse,
     ProductPageConfigPreviewRequest,
     ProductPageConfigPreviewResponse,
@@ -22,54 +25,178 @@ from domain.schemas.search import (
     GroupResponse,
     GroupCreate,
     GroupUpdate,
+    GroupSummaryResponse,
+    CountResponse,
+    GroupLabelIdsRequest,
+    GroupLabelIdsResponse,
+    GroupLabelMembershipResponse,
+    SearchResultHistoryResponse,
+    TransferImportResponse,
     GeneralSuccessResponse,
 )
 from databases.sql.search.repository import (
     SearchURLConfigRepositorySQL as urlconfig_repo,
     ProductPageConfigRepositorySQL as productconfig_repo,
     GroupRepository,
+    SearchResultHistoryRepositorySQL,
+    get_catalog_version,
 )
 from app.search.search_api import (
     search_via_api_for_preview,
     get_product_via_api_for_preview,
+    search_via_api_by_label,
+    search_via_api_by_labels,
+    iter_search_via_api_by_labels,
 )
+from app.search import cache as search_cache
+from app.getdata import get_circuit_breaker_statuses
+from app.getdata.models.breaker import CircuitBreakerStatus
 from app.label.add import SearchLabelDownLoadConfigTemplateService
+from app.label.transfer import SearchConfigExportService, SearchConfigImportService
+from common.read_config import get_api_options
+from common.responses import OrjsonResponse, default_response_class_options
+from common.http_cache import (
+    CACHE_CONTROL_STATIC,
+    make_etag,
+    etag_matches,
+    cache_headers,
+    not_modified,
+)
+from common.pagination import (
+    OrderBy,
+    decode_cursor,
+    split_page,
+    parse_fields,
+    dump_fields,
+)
+
+router = APIRouter(prefix="/api", tags=["api"], **default_response_class_options())
+
+MAX_PAGE_SIZE = 1000
+
+
+def _page_command_args(cursor: str | None, limit: int | None, order_by: OrderBy):
+    """一覧取得のCommandに渡すページング引数。次ページ有無の判定のため1件多く取る"""
+    try:
+        page_cursor = decode_cursor(cursor, order_by) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "order_by": order_by,
+        "after_id": page_cursor.id if page_cursor else None,
+        "after_label_name": page_cursor.label_name if page_cursor else None,
+        "limit": limit + 1 if limit is not None else None,
+    }
 
-router = APIRouter(prefix="/api", tags=["api"])
+
+def config_filter_args(
+    sitename: str | None = Query(default=None),
+    config_label: str | None = Query(default=None),
+    recreate_parser: bool | None = Query(default=None),
+) -> dict:
+    """download_configの値(生成列)での絞り込み条件"""
+    return {
+        "sitename": sitename,
+        "config_label": config_label,
+        "recreate_parser": recreate_parser,
+    }
+
+
+def _page_response(
+    response: Response,
+    items: list,
+    fields: set[str] | None,
+    next_cursor: str | None,
+    headers: dict | None = None,
+):
+    """次ページのカーソルはX-Next-Cursorヘッダーで返す"""
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if fields is not None:
+        return OrjsonResponse(content=dump_fields(items, fields), headers=headers)
+    response.headers.update(headers)
+    return items
 
 
 @router.get("/labels/", response_model=list[SearchLabelResponse])
 async def get_labels(
     request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_async_session),
     label: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    order_by: OrderBy = Query(default="id"),
+    fields: str | None = Query(default=None),
+    config_filter: dict = Depends(config_filter_args),
 ):
+    """
+    ラベル一覧の取得。limit指定時はキーセットページングとなり、
+    続きがあればX-Next-Cursorヘッダーの値をcursorに指定して取得する。
+    fieldsにカンマ区切りで項目名を指定するとその項目(とid)のみ返す。
+    fieldsにdownload_configが無ければdownload_configは読み込まない。
+    """
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
         router_path=request.url.path,
         request_id=str(uuid.uuid4()),
     )
     log = structlog.get_logger(__name__)
-    log.info("api labels called", label=label)
+    log.info("api labels called", label=label, cursor=cursor, limit=limit)
+    try:
+        include = parse_fields(fields, SearchLabelResponse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = make_etag(await get_catalog_version(db), "labels", str(request.url.query))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    with_config = include is None or "download_config" in include
     db_labels = await urlconfig_repo(db).get_all(
-        search_command.SearchURLConfigCommand(label_name=label)
+        search_command.SearchURLConfigCommand(
+            label_name=label,
+            include_config=with_config,
+            **config_filter,
+            **_page_command_args(cursor, limit, order_by),
+        )
     )
-    if db_labels:
-        labels = [
-            SearchLabelResponse(
-                id=db_label.id,
-                label_name=db_label.label_name,
-                base_url=db_label.base_url,
-                query=db_label.query,
-                query_encoding=db_label.query_encoding,
-                download_type=db_label.download_type,
-                download_config=db_label.download_config,
-            )
-            for db_label in db_labels
-        ]
-    else:
-        labels = []
-    return labels
+    db_labels, next_cursor = split_page(db_labels, limit, order_by)
+    labels = [
+        SearchLabelResponse(
+            id=db_label.id,
+            label_name=db_label.label_name,
+            base_url=db_label.base_url,
+            query=db_label.query,
+            query_encoding=db_label.query_encoding,
+            download_type=db_label.download_type,
+            download_config=db_label.download_config if with_config else {},
+        )
+        for db_label in db_labels
+    ]
+    return _page_response(
+        response, labels, include, next_cursor, headers=cache_headers(etag)
+    )
+
+
+@router.get("/labels/count/", response_model=CountResponse)
+async def count_labels(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    label: str | None = Query(default=None),
+    config_filter: dict = Depends(config_filter_args),
+):
+    """ラベル件数の取得"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api count labels called", label=label)
+    count = await urlconfig_repo(db).count(
+        search_command.SearchURLConfigCommand(label_name=label, **config_filter)
+    )
+    return CountResponse(count=count)
 
 
 @router.post("/labels/", response_model=SearchURLConfigResponse)
@@ -127,6 +254,7 @@ async def update_label(
         await urlconfig_repo(db).save_all([urlconfig])
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    search_cache.invalidate_label(id)
     return SearchURLConfigResponse(success=True)
 
 
@@ -164,6 +292,7 @@ async def delete_label(
         await urlconfig_repo(db).delete_by_id(id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=f"type:{type(e)}, value:{e}")
+    search_cache.invalidate_label(id)
     return SearchURLConfigResponse(success=True)
 
 
@@ -184,14 +313,14 @@ async def get_label_config_template(
     log.info("api label config template called", option_type=option_type)
 
     service = SearchLabelDownLoadConfigTemplateService(option_type=option_type)
-    config_template = await service.execute()
-
-    if config_template is None:
-        raise HTTPException(
-            status_code=404, detail=f"No template found for option_type: {option_type}"
-        )
-
-    return config_template.model_dump(exclude_none=True)
+    rendered = await service.execute_rendered()
+    if etag_matches(request, rendered.etag):
+        return not_modified(rendered.etag, CACHE_CONTROL_STATIC)
+    return Response(
+        content=rendered.body,
+        media_type="application/json",
+        headers=cache_headers(rendered.etag, CACHE_CONTROL_STATIC),
+    )
 
 
 @router.post("/labels/search/", response_model=SearchByLabelResponse)
@@ -216,23 +345,90 @@ async def search_by_label(
         raise HTTPException(
             status_code=500, detail="Multiple labels found with the same ID"
         )
-    db_label = db_labels[0]
-    preview_request = SearchURLConfigPreviewRequest(
-        id=db_label.id,
-        label_name=db_label.label_name,
-        base_url=db_label.base_url,
-        query=db_label.query,
-        query_encoding=db_label.query_encoding,
-        download_type=db_label.download_type,
-        download_config=db_label.download_config,
-        keywords=[searchreq.keyword],
-    )
-    response = await search_via_api_for_preview(ses=db, searchreq=preview_request)
-    if len(response.results) == 0:
+    result = await search_via_api_by_label(
+        ses=db,
+        label_config=db_labels[0],
+        keyword=searchreq.keyword,
+        use_cache=searchreq.use_cache,
+    )
+    if result is None:
         return SearchByLabelResponse(results={})
-    # response.resultsはURLをキーとする辞書なので、最初の値を取得する
-    first_result = list(response.results.values())[0]
-    return SearchByLabelResponse(results={searchreq.label_id: first_result})
+    return SearchByLabelResponse(results={searchreq.label_id: result})
+
+
+async def _get_labels_for_search(
+    db: AsyncSession, searchreq: SearchByLabelsRequest
+) -> list[search_model.SearchURLConfig]:
+    if searchreq.group_id is not None:
+        db_labels = await GroupRepository(db).get_labels_for_group(searchreq.group_id)
+        if searchreq.label_ids:
+            label_ids = set(searchreq.label_ids)
+            db_labels = [db_label for db_label in db_labels if db_label.id in label_ids]
+    elif searchreq.label_ids:
+        db_labels = await urlconfig_repo(db).get_all(
+            command=search_command.SearchURLConfigCommand(ids=searchreq.label_ids)
+        )
+    else:
+        raise HTTPException(status_code=400, detail="label_ids or group_id is required")
+    if not db_labels:
+        raise HTTPException(status_code=404, detail="Label not found")
+    return db_labels
+
+
+@router.post("/labels/search/batch/", response_model=SearchByLabelResponse)
+async def search_by_labels(
+    request: Request,
+    searchreq: SearchByLabelsRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """複数ラベル(またはグループ)をまとめて検索し、ラベルID毎の結果を返す"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api search by labels batch called", searchreq=searchreq)
+    db_labels = await _get_labels_for_search(db, searchreq)
+    return await search_via_api_by_labels(
+        ses=db,
+        label_configs=db_labels,
+        keyword=searchreq.keyword,
+        max_concurrency=get_api_options().search.max_concurrency,
+        use_cache=searchreq.use_cache,
+    )
+
+
+@router.post("/labels/search/stream/", response_class=StreamingResponse)
+async def search_by_labels_stream(
+    request: Request,
+    searchreq: SearchByLabelsRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    複数ラベルの検索結果を完了したものから順にNDJSON(1行1ラベル)で返す。
+    各行は SearchByLabelStreamItem。
+    """
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api search by labels stream called", searchreq=searchreq)
+    db_labels = await _get_labels_for_search(db, searchreq)
+
+    async def _ndjson_lines():
+        async for item in iter_search_via_api_by_labels(
+            ses=db,
+            label_configs=db_labels,
+            keyword=searchreq.keyword,
+            max_concurrency=get_api_options().search.max_concurrency,
+            use_cache=searchreq.use_cache,
+        ):
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(_ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.post(
@@ -257,34 +453,70 @@ async def post_product_page_config_preview(
 @router.get("/labels/product/", response_model=list[ProductLabelResponse])
 async def get_product_page_labels(
     request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_async_session),
     label: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    order_by: OrderBy = Query(default="id"),
+    fields: str | None = Query(default=None),
+    config_filter: dict = Depends(config_filter_args),
 ):
+    """商品ページラベル一覧の取得。ページングと絞り込みはget_labelsと同じ"""
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
         router_path=request.url.path,
         request_id=str(uuid.uuid4()),
     )
     log = structlog.get_logger(__name__)
-    log.info("api product page labels called", label=label)
+    log.info("api product page labels called", label=label, cursor=cursor, limit=limit)
+    try:
+        include = parse_fields(fields, ProductLabelResponse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with_config = include is None or "download_config" in include
     db_labels = await productconfig_repo(db).get_all(
-        search_command.ProductPageConfigCommand(label_name=label)
+        search_command.ProductPageConfigCommand(
+            label_name=label,
+            include_config=with_config,
+            **config_filter,
+            **_page_command_args(cursor, limit, order_by),
+        )
     )
-    if db_labels:
-        labels = [
-            ProductLabelResponse(
-                id=db_label.id,
-                label_name=db_label.label_name,
-                url_pattern=db_label.url_pattern,
-                pattern_type=db_label.pattern_type,
-                download_type=db_label.download_type,
-                download_config=db_label.download_config,
-            )
-            for db_label in db_labels
-        ]
-    else:
-        labels = []
-    return labels
+    db_labels, next_cursor = split_page(db_labels, limit, order_by)
+    labels = [
+        ProductLabelResponse(
+            id=db_label.id,
+            label_name=db_label.label_name,
+            url_pattern=db_label.url_pattern,
+            pattern_type=db_label.pattern_type,
+            download_type=db_label.download_type,
+            download_config=db_label.download_config if with_config else {},
+        )
+        for db_label in db_labels
+    ]
+    return _page_response(response, labels, include, next_cursor)
+
+
+@router.get("/labels/product/count/", response_model=CountResponse)
+async def count_product_page_labels(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    label: str | None = Query(default=None),
+    config_filter: dict = Depends(config_filter_args),
+):
+    """商品ページラベル件数の取得"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api count product page labels called", label=label)
+    count = await productconfig_repo(db).count(
+        search_command.ProductPageConfigCommand(label_name=label, **config_filter)
+    )
+    return CountResponse(count=count)
 
 
 @router.post("/labels/product/", response_model=ProductPageConfigResponse)
@@ -368,6 +600,7 @@ async def delete_product_page_label(
 @router.get("/groups/", response_model=list[GroupResponse])
 async def get_all_groups(
     request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_async_session),
 ):
     """グループ一覧の取得"""
@@ -378,6 +611,10 @@ async def get_all_groups(
     )
     log = structlog.get_logger(__name__)
     log.info("api get all groups called")
+    etag = make_etag(await get_catalog_version(db), "groups", str(request.url.query))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     repo = GroupRepository(db)
     db_groups = await repo.get_all_groups()
     if db_groups:
@@ -393,9 +630,37 @@ async def get_all_groups(
     return groups
 
 
+@router.get("/groups/summary/", response_model=list[GroupSummaryResponse])
+async def get_group_summaries(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """グループ一覧と所属ラベル数の取得"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api get group summaries called")
+    etag = make_etag(
+        await get_catalog_version(db), "group_summaries", str(request.url.query)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    repo = GroupRepository(db)
+    return [
+        GroupSummaryResponse(id=db_group.id, name=db_group.name, label_count=count)
+        for db_group, count in await repo.get_groups_with_label_count()
+    ]
+
+
 @router.get("/groups/{group_id}/labels/", response_model=list[SearchLabelResponse])
 async def get_labels_for_group(
     request: Request,
+    response: Response,
     group_id: int,
     db: AsyncSession = Depends(get_async_session),
 ):
@@ -407,6 +672,14 @@ async def get_labels_for_group(
     )
     log = structlog.get_logger(__name__)
     log.info("api get labels for group called", group_id=group_id)
+    etag = make_etag(
+        await get_catalog_version(db),
+        f"group_labels:{group_id}",
+        str(request.url.query),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     repo = GroupRepository(db)
     db_labels = await repo.get_labels_for_group(group_id)
     if db_labels:
@@ -552,3 +825,232 @@ async def remove_label_from_group(
     if not success:
         raise HTTPException(status_code=404, detail="Link not found")
     return GeneralSuccessResponse(success=True)
+
+
+@router.get(
+    "/groups/{group_id}/labels/membership/",
+    response_model=list[GroupLabelMembershipResponse],
+)
+async def get_label_memberships(
+    request: Request,
+    group_id: int,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """全ラベルの一覧を、指定グループへの所属有無付きで取得"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api get label memberships called", group_id=group_id)
+    repo = GroupRepository(db)
+    if not await repo.get_group_by_id(group_id):
+        raise HTTPException(status_code=404, detail="Group not found")
+    return [
+        GroupLabelMembershipResponse(
+            id=db_label.id,
+            label_name=db_label.label_name,
+            base_url=db_label.base_url,
+            query=db_label.query,
+            query_encoding=db_label.query_encoding,
+            download_type=db_label.download_type,
+            download_config=db_label.download_config,
+            in_group=in_group,
+        )
+        for db_label, in_group in await repo.get_label_memberships(group_id)
+    ]
+
+
+@router.put("/groups/{group_id}/labels/", response_model=GroupLabelIdsResponse)
+async def set_labels_for_group(
+    request: Request,
+    group_id: int,
+    labelsreq: GroupLabelIdsRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """指定グループの所属ラベルをまとめて置き換える"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info(
+        "api set labels for group called",
+        group_id=group_id,
+        label_ids=labelsreq.label_ids,
+    )
+    repo = GroupRepository(db)
+    try:
+        label_ids = await repo.set_labels_for_group(group_id, labelsreq.label_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if label_ids is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return GroupLabelIdsResponse(success=True, group_id=group_id, label_ids=label_ids)
+
+
+@router.post(
+    "/groups/{group_id}/labels/batch/add/", response_model=GroupLabelIdsResponse
+)
+async def add_labels_to_group(
+    request: Request,
+    group_id: int,
+    labelsreq: GroupLabelIdsRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """指定グループに複数のラベルをまとめて所属させる"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info(
+        "api add labels to group called",
+        group_id=group_id,
+        label_ids=labelsreq.label_ids,
+    )
+    repo = GroupRepository(db)
+    try:
+        label_ids = await repo.add_labels_to_group(group_id, labelsreq.label_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if label_ids is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return GroupLabelIdsResponse(success=True, group_id=group_id, label_ids=label_ids)
+
+
+@router.post(
+    "/groups/{group_id}/labels/batch/remove/", response_model=GroupLabelIdsResponse
+)
+async def remove_labels_from_group(
+    request: Request,
+    group_id: int,
+    labelsreq: GroupLabelIdsRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """指定グループから複数のラベルをまとめて外す"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info(
+        "api remove labels from group called",
+        group_id=group_id,
+        label_ids=labelsreq.label_ids,
+    )
+    repo = GroupRepository(db)
+    label_ids = await repo.remove_labels_from_group(group_id, labelsreq.label_ids)
+    if label_ids is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return GroupLabelIdsResponse(success=True, group_id=group_id, label_ids=label_ids)
+
+
+# --- Import / Export ---
+
+
+@router.get("/configs/export/", response_class=StreamingResponse)
+async def export_configs(request: Request):
+    """ラベル/商品ラベル/グループ/グループ所属をNDJSONで出力する"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api export configs called")
+
+    async def generate():
+        # レスポンス送信中もセッションを保持するため、ここで開く
+        async with aSessionLocal() as ses:
+            async for line in SearchConfigExportService(ses).execute():
+                yield line
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": 'attachment; filename="ex_search_configs.ndjson"'
+        },
+    )
+
+
+@router.post("/configs/import/", response_model=TransferImportResponse)
+async def import_configs(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    chunk_size: int = Query(default=500, ge=1, le=5000),
+):
+    """export_configsの出力形式(NDJSON)を取り込む。idが同じものは上書きする"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api import configs called")
+    service = SearchConfigImportService(db_session=db, chunk_size=chunk_size)
+    result = await service.execute(request.stream())
+    log.info(
+        "api import configs finished",
+        success=result.success,
+        counts=result.counts,
+        errors=len(result.errors),
+    )
+    return result
+
+
+# --- Search history ---
+
+
+@router.get("/history/", response_model=list[SearchResultHistoryResponse])
+async def get_search_history(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    label_id: int | None = Query(default=None),
+    keyword: str | None = Query(default=None),
+    url: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """過去の検索結果の取得(新しい順)。上流には問い合わせない"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api get search history called")
+    repo = SearchResultHistoryRepositorySQL(db)
+    db_rows = await repo.get_all(
+        search_command.SearchResultHistoryCommand(
+            label_id=label_id,
+            keyword=keyword,
+            url=url,
+            since=since,
+            until=until,
+            limit=limit,
+        )
+    )
+    return [SearchResultHistoryResponse.model_validate(row) for row in db_rows]
+
+
+# --- Upstream status ---
+
+
+@router.get("/upstream/breakers/", response_model=list[CircuitBreakerStatus])
+async def get_upstream_breakers(request: Request):
+    """サイト毎のサーキットブレーカーの状態一覧の取得"""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        router_path=request.url.path,
+        request_id=str(uuid.uuid4()),
+    )
+    log = structlog.get_logger(__name__)
+    log.info("api upstream breakers called")
+    return get_circuit_breaker_statuses()
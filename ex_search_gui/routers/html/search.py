@@ -20,11 +20,13 @@ from databases.sql.util import get_async_session
 from app.label import SearchLabelViewTemplateService, ProductPageLabelMatchService
 from app.s2k import utils as s2k_utils
 from common.read_config import get_html_options
+from common.pagination import decode_cursor, split_page
 from domain.schemas.search.search import (
     SearchURLConfigSchema,
     SearchURLConfigPreviewRequest,
     ProductPageConfig,
     ProductPageConfigPreviewRequest,
+    GroupSummaryResponse,
 )
 from domain.schemas.search.html import (
     SearchLabelAddForm,
@@ -44,6 +46,7 @@ async def read_search(
     request: Request,
     db: AsyncSession = Depends(get_async_session),
     group_id: str = Query(default=""),
+    cursor: str | None = Query(default=None),
 ):
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
@@ -63,16 +66,35 @@ async def read_search(
         group_id_int = int(group_id)
     except ValueError:
         group_id_int = None
+    html_opts = get_html_options()
+    next_cursor = None
     if group_id_int:
         # グループが選択されている場合は、そのグループに所属するラベルを取得
         labels = await group_repo.get_labels_for_group(group_id_int)
     else:
-        # グループが選択されていない場合は、すべてのラベルを取得
-        labels = await labels_repo.get_all(search_command.SearchURLConfigCommand())
-
-    context = {"groups": groups, "labels": labels, "selected_group_id": group_id_int}
+        # グループが選択されていない場合は、すべてのラベルをページ単位で取得
+        try:
+            page_cursor = decode_cursor(cursor, "id") if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        labels, next_cursor = split_page(
+            await labels_repo.get_all(
+                search_command.SearchURLConfigCommand(
+                    after_id=page_cursor.id if page_cursor else None,
+                    limit=html_opts.page_size + 1,
+                )
+            ),
+            html_opts.page_size,
+            "id",
+        )
 
-    html_opts = get_html_options()
+    context = {
+        "groups": groups,
+        "labels": labels,
+        "selected_group_id": group_id_int,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+    }
 
     try:
         show_registration = bool(html_opts.search2kakaku.registration)
@@ -101,6 +123,7 @@ async def read_labels(
     request: Request,
     db: AsyncSession = Depends(get_async_session),
     label: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
 ):
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
@@ -108,10 +131,18 @@ async def read_labels(
         request_id=str(uuid.uuid4()),
     )
     log = structlog.get_logger(__name__)
-    log.info("html labels called", label=label)
-    service = SearchLabelViewTemplateService(db_session=db, label=label)
-    labels = await service.execute(label=label)
-    context = labels.model_dump() | {"label": label}
+    log.info("html labels called", label=label, cursor=cursor)
+    service = SearchLabelViewTemplateService(
+        db_session=db,
+        label=label,
+        cursor=cursor,
+        limit=get_html_options().page_size,
+    )
+    try:
+        labels = await service.execute(label=label)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    context = labels.model_dump() | {"label": label, "cursor": cursor}
     return templates.TemplateResponse(
         request=request, name="search/label_view.html", context=context
     )
@@ -231,6 +262,7 @@ async def read_product_labels(
     request: Request,
     db: AsyncSession = Depends(get_async_session),
     label: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
 ):
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
@@ -238,13 +270,27 @@ async def read_product_labels(
         request_id=str(uuid.uuid4()),
     )
     log = structlog.get_logger(__name__)
-    log.info("html product labels called", label=label)
+    log.info("html product labels called", label=label, cursor=cursor)
 
+    page_size = get_html_options().page_size
+    try:
+        page_cursor = decode_cursor(cursor, "id") if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     repo = ProductPageConfigRepositorySQL(db)
-    command = search_command.ProductPageConfigCommand(label_name=label)
-    configs = await repo.get_all(command)
+    command = search_command.ProductPageConfigCommand(
+        label_name=label,
+        after_id=page_cursor.id if page_cursor else None,
+        limit=page_size + 1,
+    )
+    configs, next_cursor = split_page(await repo.get_all(command), page_size, "id")
 
-    context = {"labels": configs, "label": label}
+    context = {
+        "labels": configs,
+        "label": label,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+    }
     return templates.TemplateResponse(
         request=request, name="search/product_label_view.html", context=context
     )
@@ -498,7 +544,10 @@ async def read_groups(  # グループ一覧
     log.info("html groups called")
 
     repo = GroupRepository(db)
-    groups = await repo.get_all_groups()
+    groups = [
+        GroupSummaryResponse(id=group.id, name=group.name, label_count=count)
+        for group, count in await repo.get_groups_with_label_count()
+    ]
 
     context = {"groups": groups}
     return templates.TemplateResponse(
@@ -10,18 +10,85 @@ DATABASES = {
         "drivername": "sqlite+aiosqlite",
         "database": f"{BASE_DIR}/db/database.db",
     },
+    "sqlite_pragmas": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,  # KiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+}
+LOG_OPTIONS = {
+    "directory_path": f"{BASE_DIR}/log/",
+    # ログは一旦キューに入れ、別スレッドで出力する。溢れた分は捨てる
+    "queue_size": 10000,
+    "rotation": {
+        "max_bytes": 10 * 1024 * 1024,  # 0でサイズによるローテーションなし
+        "interval": 24 * 60 * 60,  # seconds, Noneで時間によるローテーションなし
+        "backup_count": 7,
+        "compress": True,  # ローテーションしたファイルをgzip圧縮する
+    },
+    # ログに含める値の大きさの上限(リクエスト全体などの大きな値を切り詰める)
+    "truncate": {
+        "max_string_length": 1000,
+        "max_items": 50,
+        "max_depth": 5,
+    },
+    # INFO以下のログを間引く割合(1.0で全て出力)。eventsはイベント名毎の指定
+    "sampling": {
+        "info_rate": 1.0,
+        "events": {},
+    },
 }
-LOG_OPTIONS = {"directory_path": f"{BASE_DIR}/log/"}
 API_OPTIONS = {
     "get_data": {
         "url": "http://localhost:8060/api/",
         "timeout": 15.0,
-        "sofmap": {"timeout": 17.0},
-        "geo": {"timeout": 18.0},
+        "client": {
+            "max_connections": 100,
+            "max_keepalive_connections": 20,
+            "keepalive_expiry": 30.0,
+            "http2": False,
+            "compression": True,
+        },
+        "circuit_breaker": {
+            "enabled": True,
+            "failure_threshold": 5,
+            "cooldown": 60.0,
+        },
+        "download_types": {
+            "httpx": {"max_in_flight": 10},
+            "selenium": {"max_in_flight": 2},
+            "nodriver": {"max_in_flight": 2},
+        },
+        "sofmap": {"timeout": 17.0, "rate": 1.0, "burst": 3, "max_in_flight": 3},
+        "geo": {"timeout": 18.0, "rate": 1.0, "burst": 3, "max_in_flight": 3},
         "gemini": {"timeout": 300.0},
-    }
+    },
+    "search": {
+        "max_concurrency": 5,
+        "preview_concurrent": True,
+        "preview_max_concurrency": 4,
+    },
+    "cache": {
+        "enabled": True,
+        "ttl": 600.0,
+        "max_entries": 1000,
+        "max_bytes": 50 * 1024 * 1024,
+        # ラベル名 / サイト名毎のTTL(秒)。ラベル名を優先し、どちらも無ければttl
+        "label_ttl": {},
+        "site_ttl": {},
+    },
+    "history": {
+        "enabled": True,
+        "batch_size": 500,
+        "flush_interval": 1.0,
+        "max_queue_size": 10000,
+    },
 }
 HTML_OPTIONS = {
+    "page_size": 100,
     "search2kakaku": {
         "registration": False,
         "url": "http://localhost:8120/",
@@ -31,3 +98,24 @@ HTML_OPTIONS = {
         "url": "http://localhost:8000/",
     },
 }
+SERVER_OPTIONS = {
+    "compression": {
+        "enabled": True,
+        "minimum_size": 1024,
+        # 優先順。brはbrotli、zstdはzstandardがインストールされている場合のみ使う
+        "encodings": ["zstd", "br", "gzip"],
+        "gzip_level": 6,
+        "brotli_quality": 4,
+        "zstd_level": 3,
+    },
+    # /metricsでPrometheus形式のメトリクスを出力する
+    "metrics": {"enabled": True},
+    # スパンをLOG_OPTIONSのdirectory_pathにJSON Linesで出力する。
+    # sample_rateは新しく始まるトレースを記録する割合
+    "tracing": {"enabled": True, "sample_rate": 1.0, "filename": "trace.jsonl"},
+}
+CONFIG_OPTIONS = {
+    "reload_on_signal": True,
+    "watch_file": True,
+    "watch_interval": 5.0,
+}